@@ -0,0 +1,375 @@
+"""
+Measures what each framework adapter's `HireFireMiddleware` costs per request, by running it
+in-process in front of a trivial application.
+
+Three cases are measured for every adapter: pass-through requests without an X-Request-Start
+header, pass-through requests with one, and /hirefire info requests. For each case the time per
+request is reported, along with the overhead compared to calling the application directly, and
+the peak memory allocated while handling a single request.
+
+Adapters whose framework isn't installed are skipped. Results are written to
+benchmarks/results/middleware-<version>.json, and compared against an earlier results file when
+one is passed with --compare.
+
+Usage:
+    python -m benchmarks.middleware [--requests N] [--adapters wsgi-flask,asgi-starlette]
+                                    [--output PATH] [--compare PATH]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+from hirefire_resource import HireFire
+from hirefire_resource.version import VERSION
+
+TOKEN = "benchmark-token"
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+CASES = ["pass-through", "x-request-start", "info"]
+
+
+def case_headers(case):
+    if case == "x-request-start":
+        return {"X-Request-Start": str(int(time.time() * 1000))}
+    return {}
+
+
+def case_path(case):
+    return f"/hirefire/{TOKEN}/info" if case == "info" else "/"
+
+
+def wsgi_environ(case):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": "",
+        "PATH_INFO": case_path(case),
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.errors": None,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in case_headers(case).items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return environ
+
+
+def asgi_scope(case):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": case_path(case),
+        "raw_path": case_path(case).encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"user-agent", b"benchmark"),
+            (b"accept", b"*/*"),
+        ]
+        + [
+            (name.lower().encode(), value.encode())
+            for name, value in case_headers(case).items()
+        ],
+    }
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def wsgi_django(case):
+    import django
+    from django.conf import settings
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from hirefire_resource.middleware.wsgi.django import HireFireMiddleware
+
+    if not settings.configured:
+        settings.configure(ALLOWED_HOSTS=["*"])
+        django.setup()
+
+    def view(request):
+        return HttpResponse("OK")
+
+    request = RequestFactory().get(
+        case_path(case),
+        **{
+            "HTTP_" + name.upper().replace("-", "_"): value
+            for name, value in case_headers(case).items()
+        },
+    )
+    middleware = HireFireMiddleware(view)
+    return (lambda: middleware(request)), (lambda: view(request))
+
+
+def wsgi_flask(case):
+    from flask import Flask
+
+    from hirefire_resource.middleware.wsgi.flask import HireFireMiddleware
+
+    app = Flask(__name__)
+    app.add_url_rule("/", "index", lambda: "OK")
+    middleware = HireFireMiddleware(app)
+    environ = wsgi_environ(case)
+
+    def call(application):
+        def handle():
+            response = application(dict(environ), start_response)
+            for _ in response:
+                pass
+            if hasattr(response, "close"):
+                response.close()
+
+        return handle
+
+    return call(middleware), call(app.wsgi_app)
+
+
+def wsgi_raw(case):
+    from hirefire_resource.middleware.wsgi.raw import HireFireMiddleware
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"OK"]
+
+    middleware = HireFireMiddleware(app)
+    environ = wsgi_environ(case)
+
+    def call(application):
+        return lambda: application(dict(environ), start_response)
+
+    return call(middleware), call(app)
+
+
+def asgi_app(middleware_factory):
+    async def app(scope, receive, send):
+        await send(
+            {"type": "http.response.start", "status": 200, "headers": [(b"a", b"b")]}
+        )
+        await send({"type": "http.response.body", "body": b"OK"})
+
+    return middleware_factory(app), app
+
+
+def asgi_case(middleware_factory):
+    def build(case):
+        middleware, app = asgi_app(middleware_factory)
+        scope = asgi_scope(case)
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        def call(application):
+            return lambda: application(dict(scope), receive, send)
+
+        return call(middleware), call(app)
+
+    return build
+
+
+def asgi_django(case):
+    from hirefire_resource.middleware.asgi.django import HireFireMiddleware
+
+    return asgi_case(HireFireMiddleware)(case)
+
+
+def asgi_starlette(case):
+    from hirefire_resource.middleware.asgi.starlette import HireFireMiddleware
+
+    return asgi_case(HireFireMiddleware)(case)
+
+
+def asgi_raw(case):
+    from hirefire_resource.middleware.asgi.raw import HireFireMiddleware
+
+    return asgi_case(HireFireMiddleware)(case)
+
+
+def asgi_quart(case):
+    from hirefire_resource.middleware.asgi.quart import HireFireMiddleware
+
+    class App:
+        def __init__(self, app):
+            self.asgi_app = app
+
+    return asgi_case(lambda app: HireFireMiddleware(App(app)))(case)
+
+
+ADAPTERS = {
+    "wsgi-django": (wsgi_django, False),
+    "wsgi-flask": (wsgi_flask, False),
+    "wsgi-raw": (wsgi_raw, False),
+    "asgi-django": (asgi_django, True),
+    "asgi-starlette": (asgi_starlette, True),
+    "asgi-quart": (asgi_quart, True),
+    "asgi-raw": (asgi_raw, True),
+}
+
+
+def measure(handle, is_async, requests):
+    if is_async:
+
+        async def run():
+            for _ in range(min(requests, 1000)):
+                await handle()
+            start = time.perf_counter_ns()
+            for _ in range(requests):
+                await handle()
+            elapsed = time.perf_counter_ns() - start
+
+            tracemalloc.start()
+            peaks = []
+            for _ in range(100):
+                coroutine = handle()
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                await coroutine
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            tracemalloc.stop()
+            return elapsed / requests, sorted(peaks)[len(peaks) // 2]
+
+        return asyncio.run(run())
+
+    for _ in range(min(requests, 1000)):
+        handle()
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        handle()
+    elapsed = time.perf_counter_ns() - start
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(100):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        handle()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return elapsed / requests, sorted(peaks)[len(peaks) // 2]
+
+
+def run(adapter, case, requests):
+    build, is_async = ADAPTERS[adapter]
+    middleware, app = build(case)
+    web = HireFire.configuration.web
+
+    ns, peak_bytes = measure(middleware, is_async, requests)
+    web._flush_buffer()
+
+    if case == "info":
+        overhead = None
+    else:
+        baseline_ns, _ = measure(app, is_async, requests)
+        overhead = ns - baseline_ns
+
+    return {
+        "ns_per_request": round(ns),
+        "overhead_ns_per_request": None if overhead is None else round(overhead),
+        "peak_bytes_per_request": peak_bytes,
+    }
+
+
+def configure():
+    os.environ["HIREFIRE_TOKEN"] = TOKEN
+
+    with HireFire.configure() as config:
+        config.dyno("web")
+        config.dyno("worker", lambda: 1)
+
+    # Recording stays in the buffer, the dispatcher isn't needed.
+    HireFire.configuration.web._dispatcher_running = True
+
+
+def compare(results, path):
+    with open(path) as file:
+        previous = json.load(file)["results"]
+
+    print(f"\nCompared to {path}:")
+    print(f"{'adapter':>16} {'case':>16} {'ns/request':>12} {'change':>8}")
+    for adapter, cases in results.items():
+        for case, result in cases.items():
+            before = previous.get(adapter, {}).get(case)
+            if not before:
+                continue
+            change = (result["ns_per_request"] / before["ns_per_request"] - 1) * 100
+            print(
+                f"{adapter:>16} {case:>16} {result['ns_per_request']:>12} "
+                f"{change:>+7.1f}%"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--adapters", default=",".join(ADAPTERS))
+    parser.add_argument(
+        "--output", default=os.path.join(RESULTS, f"middleware-{VERSION}.json")
+    )
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    configure()
+    results = {}
+
+    print(
+        f"{'adapter':>16} {'case':>16} {'ns/request':>12} {'overhead ns':>12} "
+        f"{'peak bytes':>12}"
+    )
+    for adapter in args.adapters.split(","):
+        try:
+            results[adapter] = {
+                case: run(adapter, case, args.requests) for case in CASES
+            }
+        except ImportError as e:
+            print(f"{adapter:>16} skipped: {e}")
+            continue
+
+        for case, result in results[adapter].items():
+            overhead = result["overhead_ns_per_request"]
+            print(
+                f"{adapter:>16} {case:>16} {result['ns_per_request']:>12} "
+                f"{'-' if overhead is None else overhead:>12} "
+                f"{result['peak_bytes_per_request']:>12}"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "version": VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "requests": args.requests,
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+        file.write("\n")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures the per-request overhead of the middleware's request matching and queue time recording,
+comparing the request matcher against resolving the configuration from the environment on every
+request.
+
+Usage:
+    python -m benchmarks.request_matcher [--requests N]
+"""
+
+import argparse
+import os
+import time
+
+from hirefire_resource import HireFire
+from hirefire_resource.middleware import (
+    RequestInfo,
+    calculate_request_queue_time,
+    request_matcher,
+)
+
+TOKEN = "benchmark-token"
+
+
+def legacy(request_info):
+    # The configuration lookups performed per request before the request matcher was introduced.
+    if os.environ.get("HIREFIRE_TOKEN") and HireFire.configuration.web:
+        if request_info.request_start_time:
+            web = HireFire.configuration.web
+            web.start_dispatcher()
+            web.add_to_buffer(calculate_request_queue_time(request_info))
+
+    return (
+        request_info.path == "/hirefire"
+        and os.environ.get("HIREFIRE_TOKEN")
+        and request_info.token == os.environ.get("HIREFIRE_TOKEN")
+    ) or (
+        os.environ.get("HIREFIRE_TOKEN")
+        and request_info.path == f"/hirefire/{os.environ.get('HIREFIRE_TOKEN')}/info"
+    )
+
+
+def matcher(request_info):
+    matcher = request_matcher()
+    matcher.process_request_queue_time(request_info)
+    return matcher.matches(request_info)
+
+
+CASES = {
+    "pass-through": lambda: RequestInfo(path="/"),
+    "x-request-start": lambda: RequestInfo(
+        path="/", request_start_time=str(int(time.time() * 1000))
+    ),
+    "info": lambda: RequestInfo(path=f"/hirefire/{TOKEN}/info"),
+}
+
+
+def run(handler, request_info, requests):
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        handler(request_info)
+    return (time.perf_counter_ns() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    os.environ["HIREFIRE_TOKEN"] = TOKEN
+    with HireFire.configure() as config:
+        config.dyno("web")
+    web = HireFire.configuration.web
+    # Recording stays in the buffer, the dispatcher thread isn't needed.
+    web._dispatcher_running = True
+
+    print(f"{'case':>16} {'legacy ns':>12} {'matcher ns':>12}")
+    for case, build in CASES.items():
+        request_info = build()
+        legacy_ns = run(legacy, request_info, args.requests)
+        web._flush_buffer()
+        matcher_ns = run(matcher, request_info, args.requests)
+        web._flush_buffer()
+        print(f"{case:>16} {legacy_ns:>12.0f} {matcher_ns:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares the single-lock and sharded recording paths of `Web.add_to_buffer` under thread
+contention, while a dispatcher thread concurrently flushes the buffer.
+
+Usage:
+    python -m benchmarks.web_contention [--samples N] [--threads 1,8,32]
+"""
+
+import argparse
+import threading
+import time
+
+from hirefire_resource.configuration import Configuration
+from hirefire_resource.web import Web
+
+MODES = {
+    "single-lock": {},
+    "sharded": {"sharded": True},
+}
+
+
+def run(options, threads, samples, flush_interval):
+    web = Web(Configuration(), **options)
+    barrier = threading.Barrier(threads + 1)
+    done = threading.Event()
+    flushed = []
+
+    def record():
+        add_to_buffer = web.add_to_buffer
+        barrier.wait()
+        for _ in range(samples):
+            add_to_buffer(5)
+
+    def dispatch():
+        while not done.is_set():
+            flushed.append(web._flush_buffer())
+            time.sleep(flush_interval)
+
+    workers = [threading.Thread(target=record) for _ in range(threads)]
+    dispatcher = threading.Thread(target=dispatch)
+
+    for worker in workers:
+        worker.start()
+    dispatcher.start()
+
+    barrier.wait()
+    start = time.perf_counter_ns()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter_ns() - start
+
+    done.set()
+    dispatcher.join()
+    flushed.append(web._flush_buffer())
+
+    recorded = sum(len(bucket) for buffer in flushed for bucket in buffer.values())
+    assert recorded == threads * samples, (recorded, threads * samples)
+
+    return elapsed / (threads * samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20_000)
+    parser.add_argument("--threads", default="1,8,32")
+    parser.add_argument("--flush-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'mode':>12} {'ns/sample':>12}")
+    for threads in [int(n) for n in args.threads.split(",")]:
+        for mode, options in MODES.items():
+            ns = run(options, threads, args.samples, args.flush_interval)
+            print(f"{threads:>8} {mode:>12} {ns:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
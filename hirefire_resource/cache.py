@@ -0,0 +1,90 @@
+import json
+import uuid
+
+
+class MemoryCache:
+    """
+    Keeps the last measured value of each worker in process memory. This is the default cache
+    of a `Worker`.
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, timestamp):
+        self._entries[key] = (value, timestamp)
+
+    def acquire(self, key, timeout):
+        return True
+
+    def release(self, key):
+        pass
+
+
+class RedisCache:
+    """
+    Keeps the last measured value of each worker in Redis, so that every dyno serves the values
+    measured by any of them.
+
+    Background refreshes are coordinated with a lock per worker, so only one dyno at a time
+    measures a worker whose value went stale. The lock expires after `timeout` seconds in case
+    the dyno holding it dies.
+
+    Its methods block on Redis, so ASGI applications call them on the event loop's default
+    executor.
+
+    Usage:
+        RedisCache(redis.Redis.from_url(os.environ["REDIS_URL"]))
+    """
+
+    _RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    blocking = True
+
+    def __init__(self, client, prefix="hirefire-resource"):
+        self.client = client
+        self.prefix = prefix
+        # The tokens of the locks held by this process. A lock may be released by another
+        # thread than the one that acquired it.
+        self._tokens = {}
+
+    def get(self, key):
+        entry = self.client.get(f"{self.prefix}:{key}")
+
+        if entry is None:
+            return None
+
+        value, timestamp = json.loads(entry)
+        return value, timestamp
+
+    def set(self, key, value, timestamp):
+        self.client.set(f"{self.prefix}:{key}", json.dumps([value, timestamp]))
+
+    def acquire(self, key, timeout):
+        token = uuid.uuid4().hex
+
+        if self.client.set(
+            f"{self.prefix}:{key}:lock", token, nx=True, px=int(timeout * 1000)
+        ):
+            self._tokens[key] = token
+            return True
+
+        return False
+
+    def release(self, key):
+        token = self._tokens.pop(key, None)
+
+        if token is not None:
+            self.client.eval(
+                self._RELEASE_SCRIPT, 1, f"{self.prefix}:{key}:lock", token
+            )
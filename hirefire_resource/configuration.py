@@ -1,6 +1,7 @@
 import logging
 import sys
 
+from hirefire_resource.refresher import Refresher
 from hirefire_resource.web import Web
 from hirefire_resource.worker import Worker
 
@@ -9,6 +10,10 @@ class Configuration:
     def __init__(self):
         self.web = None
         self.workers = []
+        self.worker_concurrency = 1
+        self.info_timeout = None
+        self.refresh_interval = None
+        self.refresher = Refresher(self)
         self.logger = self._init_logger()
 
     def _init_logger(self):
@@ -25,8 +30,8 @@ class Configuration:
 
         return logger
 
-    def dyno(self, name, proc=None):
+    def dyno(self, name, proc=None, **options):
         if name == "web":
-            self.web = Web(self)
+            self.web = Web(self, **options)
         else:
-            self.workers.append(Worker(name, proc))
+            self.workers.append(Worker(name, proc, **options))
@@ -0,0 +1,53 @@
+import random
+import time
+
+
+class DispatchPolicy:
+    """
+    Decides when the web metrics dispatcher submits its buffer.
+
+    The dispatch interval is randomized by `jitter` (a fraction of the interval), so processes
+    started at the same time don't dispatch in lockstep. After a failed dispatch the interval
+    doubles with every consecutive failure, up to `max_interval`.
+
+    After `failure_threshold` consecutive failures the circuit opens, and dispatches fail fast
+    without a request until the backed-off interval has elapsed. The next dispatch is then let
+    through as a trial (half-open). If it succeeds the circuit closes, otherwise it opens again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, jitter=0.1, max_interval=30, failure_threshold=5):
+        self.jitter = jitter
+        self.max_interval = max_interval
+        self.failure_threshold = failure_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self._open_until = 0
+
+    def allow(self):
+        if self.state == self.OPEN and time.monotonic() >= self._open_until:
+            self.state = self.HALF_OPEN
+
+        return self.state != self.OPEN
+
+    def interval(self, interval):
+        if self.failures:
+            interval = min(interval * 2**self.failures, self.max_interval)
+
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self, interval):
+        self.failures += 1
+
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._open_until = time.monotonic() + min(
+                interval * 2**self.failures, self.max_interval
+            )
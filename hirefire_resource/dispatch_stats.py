@@ -0,0 +1,61 @@
+from collections import deque
+
+
+class DispatchStats:
+    """
+    Counters kept by `Web` about recording and dispatching web metrics.
+
+    Dispatch latencies are kept for the most recent `window` dispatches, from which the median
+    and 99th percentile are calculated on demand. Failures are counted by type: the HTTP status
+    for error responses, otherwise the name of the exception that caused the failure.
+    """
+
+    def __init__(self, window=1000):
+        self.recorded = 0
+        self.dropped = 0
+        self.dispatches = 0
+        self.failures = {}
+        self.skipped = 0
+        self.lock_contentions = 0
+        self.lock_wait_ns = 0
+        self.latencies = deque(maxlen=window)
+
+    def record_dispatch(self, latency):
+        self.dispatches += 1
+        self.latencies.append(latency)
+
+    def record_failure(self, error, latency=None):
+        failure_type = self.failure_type(error)
+        self.failures[failure_type] = self.failures.get(failure_type, 0) + 1
+
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def record_lock_wait(self, wait_ns):
+        self.lock_contentions += 1
+        self.lock_wait_ns += wait_ns
+
+    def latency(self, percentile=None):
+        latencies = self.latencies
+
+        if not latencies:
+            return None
+        if percentile is None:
+            return latencies[-1]
+
+        ordered = sorted(latencies)
+        return ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+
+    @staticmethod
+    def failure_type(error):
+        # Dispatch errors are re-raised as a DispatchError while handling the original error, so
+        # the cause is found at the end of the exception's context chain.
+        while error.__context__ is not None:
+            error = error.__context__
+
+        status = getattr(error, "status", None)
+
+        if status is not None:
+            return f"HTTP {status}"
+
+        return type(error).__name__
@@ -1,3 +1,11 @@
 class MissingQueueError(Exception):
     def __init__(self):
         super().__init__("No queue was specified. Please specify at least one queue.")
+
+
+class ManagementAPIError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(
+            f"The RabbitMQ management API responded with {status} {reason}."
+        )
+        self.status = status
@@ -0,0 +1,133 @@
+class Histogram:
+    """
+    Fixed-size aggregate of request queue times recorded within a single second.
+
+    Values are tracked as a count, sum, minimum and maximum, along with log2-scaled bucket
+    counts. Bucket 0 holds 0ms, bucket 1 holds 1ms, bucket 2 holds 2-3ms, bucket 3 holds 4-7ms,
+    and so on. Values beyond the last bucket are counted in the last bucket.
+
+    The interface mirrors the subset of `list` used by `Web`'s buffer (`append` and `extend`), so
+    either can be used as a per-second bucket.
+    """
+
+    BUCKETS = 32
+
+    __slots__ = ("count", "sum", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * self.BUCKETS
+
+    def append(self, value):
+        self.count += 1
+        self.sum += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        self.buckets[min(value.bit_length(), self.BUCKETS - 1)] += 1
+
+    def extend(self, other):
+        if not other.count:
+            return
+
+        self.count += other.count
+        self.sum += other.sum
+
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+        buckets = self.buckets
+        for index, count in enumerate(other.buckets):
+            if count:
+                buckets[index] += count
+
+    def to_dict(self):
+        buckets = self.buckets
+        size = len(buckets)
+
+        while size and not buckets[size - 1]:
+            size -= 1
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "buckets": buckets[:size],
+        }
+
+    def to_list(self):
+        """
+        Approximates the recorded values as a sorted list, the per-second format accepted by the
+        dispatch endpoint. The minimum and maximum are exact. The other values start in the
+        middle of their bucket and are then moved within it, and within the minimum and maximum,
+        until they add up to the exact sum, so that the list has the recorded mean.
+        """
+        values = []
+        bounds = []
+
+        for index, count in enumerate(self.buckets):
+            if count:
+                low = max(1 << index >> 1, self.min)
+                # The last bucket also holds the values beyond it.
+                high = self.max if index == self.BUCKETS - 1 else (1 << index) - 1
+                high = min(high, self.max)
+                values.extend([(low + high) // 2] * count)
+                bounds.extend([(low, high)] * count)
+
+        if values:
+            values[0] = self.min
+            values[-1] = self.max
+            self._spread(values, bounds, self.sum - sum(values))
+            values.sort()
+
+        return values
+
+    @staticmethod
+    def _spread(values, bounds, remainder):
+        # Spreads the remainder evenly over the values between the minimum and the maximum. As the
+        # recorded values fit these bounds, the exact sum can always be reached.
+        while remainder:
+            sign = 1 if remainder > 0 else -1
+            rooms = []
+
+            for index in range(1, len(values) - 1):
+                low, high = bounds[index]
+                room = high - values[index] if sign > 0 else values[index] - low
+                if room > 0:
+                    rooms.append((index, room))
+
+            if not rooms:
+                return
+
+            share = max(abs(remainder) // len(rooms), 1)
+
+            for index, room in rooms:
+                step = min(share, room, abs(remainder))
+                values[index] += sign * step
+                remainder -= sign * step
+
+                if not remainder:
+                    return
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.buckets.__sizeof__()
+
+    def __len__(self):
+        return self.count
+
+    def __eq__(self, other):
+        if not isinstance(other, Histogram):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Histogram({self.to_dict()})"
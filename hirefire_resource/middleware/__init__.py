@@ -1,5 +1,6 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from hirefire_resource import HireFire
 
@@ -16,34 +17,210 @@ class RequestInfo:
         self.token = token
 
 
-def matches_hirefire_path(request_info):
-    return (
-        os.environ.get("HIREFIRE_TOKEN")
-        and request_info.path == "/hirefire"
-        and request_info.token == os.environ.get("HIREFIRE_TOKEN")
+class RequestMatcher:
+    """
+    Configuration needed on every request, resolved once so that requests that don't concern
+    HireFire only cost a couple of comparisons.
+
+    A matcher is built lazily for the current `HireFire.configuration` and its web configuration,
+    and rebuilt when either is replaced. Call `refresh_request_matcher` after changing the
+    `HIREFIRE_TOKEN` environment variable at runtime.
+    """
+
+    def __init__(self, configuration):
+        self.configuration = configuration
+        self.configured_web = configuration.web
+        # An empty token is treated as unset, so that it matches no request.
+        self.token = os.environ.get("HIREFIRE_TOKEN") or None
+        self.info_path = f"/hirefire/{self.token}/info" if self.token else None
+        self.web = configuration.web if self.token else None
+
+    def matches_hirefire_path(self, request_info):
+        return (
+            self.token is not None
+            and request_info.path == "/hirefire"
+            and request_info.token == self.token
+        )
+
+    def matches_info_path(self, request_info):
+        return self.token is not None and request_info.path == self.info_path
+
+    def matches(self, request_info):
+        return self.matches_hirefire_path(request_info) or self.matches_info_path(
+            request_info
+        )
+
+    def process_request_queue_time(self, request_info):
+        web = self.web
+
+        if web is None or not request_info.request_start_time:
+            return
+
+        now = web.clock()
+        request_queue_time = calculate_request_queue_time(request_info, now)
+
+        web.start_dispatcher()
+        web.add_to_buffer(request_queue_time, now)
+
+
+_request_matcher = None
+
+
+def request_matcher():
+    global _request_matcher
+
+    matcher = _request_matcher
+    configuration = HireFire.configuration
+
+    if (
+        matcher is None
+        or matcher.configuration is not configuration
+        or matcher.configured_web is not configuration.web
+    ):
+        matcher = _request_matcher = RequestMatcher(configuration)
+
+    return matcher
+
+
+def refresh_request_matcher():
+    global _request_matcher
+    _request_matcher = None
+
+
+_worker_executor = None
+_worker_executor_key = None
+
+
+def worker_executor():
+    """
+    Returns the thread pool on which worker procs are evaluated concurrently, bounded by
+    `HireFire.configuration.worker_concurrency`. When deadlines apply or workers are refreshed in
+    the background, the pool has at least one thread per worker, so that a proc that hangs
+    doesn't keep the other workers from being evaluated. A forked process creates its own pool,
+    as the threads of the parent's pool don't exist there.
+    """
+    global _worker_executor, _worker_executor_key
+
+    configuration = HireFire.configuration
+    max_workers = configuration.worker_concurrency
+
+    if has_worker_deadlines(configuration) or configuration.refresher.enabled:
+        max_workers = max(max_workers, len(configuration.workers))
+
+    key = (os.getpid(), max_workers)
+
+    if _worker_executor_key != key:
+        _worker_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hirefire-worker"
+        )
+        _worker_executor_key = key
+
+    return _worker_executor
+
+
+def has_worker_deadlines(configuration):
+    return configuration.info_timeout is not None or any(
+        worker.timeout is not None for worker in configuration.workers
     )
 
 
-def matches_info_path(request_info):
+def worker_deadline(worker, started):
+    """
+    Returns the monotonic time by which the worker's value must be known, given the time at
+    which its evaluation was submitted, or None when no deadline applies.
+    """
+    timeouts = [
+        timeout
+        for timeout in (worker.timeout, HireFire.configuration.info_timeout)
+        if timeout is not None
+    ]
+
+    return started + min(timeouts) if timeouts else None
+
+
+def shares_evaluation(worker):
+    """
+    Tells whether concurrent requests must share a single evaluation of the worker's proc, as
+    they do for workers whose values are cached or refreshed in the background.
+    """
     return (
-        os.environ.get("HIREFIRE_TOKEN")
-        and request_info.path == f"/hirefire/{os.environ.get('HIREFIRE_TOKEN')}/info"
+        worker.ttl is not None
+        or HireFire.configuration.refresher.interval(worker) is not None
     )
 
 
-def process_request_queue_time(request_info):
-    if not (
-        os.environ.get("HIREFIRE_TOKEN")
-        and HireFire.configuration.web
-        and request_info.request_start_time
-    ):
-        return
+def cached_worker_data(worker, entry, revalidate):
+    """
+    Returns the worker's value from its last cache entry when it may be served without measuring
+    the worker, calling `revalidate` to refresh it in the background once it's stale. Returns
+    None when the worker must be measured.
+    """
+    state = worker.cached(entry)
+
+    if state is None:
+        return None
+    if state == "stale":
+        revalidate(worker)
+
+    return worker_data(worker, entry[0])
+
+
+def refreshed_worker_data(worker):
+    """
+    Returns the worker's value from the background refresher's snapshot, flagged as stale when
+    its last refresh failed, or None when the worker isn't refreshed in the background or hasn't
+    been measured yet.
+    """
+    entry = HireFire.configuration.refresher.get(worker)
+
+    if entry is None:
+        return None
+    if entry[2]:
+        return {"name": worker.name, "value": entry[0], "stale": True}
+
+    return worker_data(worker, entry[0])
+
 
-    request_queue_time = calculate_request_queue_time(request_info)
+def worker_data(worker, value):
+    return {"name": worker.name, "value": value}
+
+
+def stale_worker_data(worker, reason, entry):
+    """
+    Returns the worker's last known value from its last cache entry, flagged as stale, for a
+    worker whose value couldn't be measured in time. A worker that was never measured is left
+    out of the response.
+    """
+    logger = HireFire.configuration.logger
+
+    if entry is None:
+        logger.error(
+            f"[HireFire] Unable to measure {worker.name}: {reason}. "
+            "It has no previous value to fall back to and was left out."
+        )
+        return None
+
+    logger.error(
+        f"[HireFire] Unable to measure {worker.name}: {reason}. "
+        "Falling back to its last known value."
+    )
+    return {"name": worker.name, "value": entry[0], "stale": True}
+
+
+def matches_hirefire_path(request_info):
+    return request_matcher().matches_hirefire_path(request_info)
+
+
+def matches_info_path(request_info):
+    return request_matcher().matches_info_path(request_info)
+
+
+def process_request_queue_time(request_info):
+    request_matcher().process_request_queue_time(request_info)
 
-    HireFire.configuration.web.start_dispatcher()
-    HireFire.configuration.web.add_to_buffer(request_queue_time)
 
+def calculate_request_queue_time(request_info, now=None):
+    if now is None:
+        now = time.time_ns()
 
-def calculate_request_queue_time(request_info):
-    return max(int(time.time() * 1000) - request_info.request_start_time, 0)
+    return max(now // 1_000_000 - request_info.request_start_time, 0)
@@ -1,42 +1,239 @@
 import asyncio
 import json
+import os
+import time
 
 from hirefire_resource import HireFire
 from hirefire_resource.middleware import (  # noqa
     RequestInfo,
+    cached_worker_data,
+    has_worker_deadlines,
     matches_hirefire_path,
     matches_info_path,
     process_request_queue_time,
+    refreshed_worker_data,
+    request_matcher,
+    shares_evaluation,
+    stale_worker_data,
+    worker_data,
+    worker_deadline,
+    worker_executor,
 )
 from hirefire_resource.version import VERSION
 
+# Static headers of the info response, encoded as ASGI expects them.
+INFO_RESPONSE_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"cache-control", b"must-revalidate, private, max-age=0"),
+    (b"hirefire-resource", f"Python-{VERSION}".encode("utf-8")),
+]
 
-async def request(request_info):
-    process_request_queue_time(request_info)
+_HIREFIRE_TOKEN = b"hirefire-token"
+_X_REQUEST_START = b"x-request-start"
 
-    if matches_hirefire_path(request_info) or matches_info_path(request_info):
-        return await construct_info_response()
 
+def extract_request_info(scope):
+    """
+    Builds the RequestInfo of an HTTP scope, finding the HireFire-Token and X-Request-Start
+    headers in a single pass over the headers that stops once both are found.
 
-async def construct_info_response():
+    Header names are expected to be lowercased, as required by the ASGI specification. Names
+    are only lowercased when their length matches one of the headers, so that requests carrying
+    neither header don't allocate anything while scanning.
+    """
+    token = None
+    request_start_time = None
+    remaining = 2
+
+    for name, value in scope["headers"]:
+        length = len(name)
+
+        if length == 14:
+            if name == _HIREFIRE_TOKEN or name.lower() == _HIREFIRE_TOKEN:
+                if token is None:
+                    token = value.decode("utf-8")
+                    remaining -= 1
+        elif length == 15:
+            if name == _X_REQUEST_START or name.lower() == _X_REQUEST_START:
+                if request_start_time is None:
+                    request_start_time = value
+                    remaining -= 1
+        else:
+            continue
+
+        if not remaining:
+            break
+
+    if request_start_time is not None:
+        try:
+            request_start_time = int(request_start_time)
+        except ValueError:
+            request_start_time = None
+
+    return RequestInfo(scope["path"], request_start_time, token)
+
+
+async def request(request_info, run_sync=None):
+    matcher = request_matcher()
+    matcher.process_request_queue_time(request_info)
+
+    if matcher.matches(request_info):
+        return await construct_info_response(run_sync)
+
+
+async def lifespan(app, scope, receive, send):
+    async def receive_with_dispatcher():
+        message = await receive()
+        configuration = HireFire.configuration
+        web = configuration.web
+
+        if os.environ.get("HIREFIRE_TOKEN"):
+            if message["type"] == "lifespan.startup":
+                if web:
+                    await web.start_async_dispatcher()
+                start_refresher(configuration)
+            elif message["type"] == "lifespan.shutdown":
+                if web:
+                    await web.stop_async_dispatcher()
+                configuration.refresher.stop()
+
+        return message
+
+    await app(scope, receive_with_dispatcher, send)
+
+
+async def construct_info_response(run_sync=None):
     headers = {
         "Content-Type": "application/json",
         "Cache-Control": "must-revalidate, private, max-age=0",
         "HireFire-Resource": f"Python-{VERSION}",
     }
-    workers_info = await collect_workers_data()
+    workers_info = await collect_workers_data(run_sync)
     body = json.dumps(workers_info)
 
     return 200, headers, body
 
 
-async def collect_workers_data():
-    data = []
+async def info_response_body():
+    return json.dumps(await collect_workers_data()).encode("utf-8")
+
+
+async def collect_workers_data(run_sync=None):
+    """
+    Collects the value of every worker. Procs that aren't coroutine functions and are evaluated
+    one after another are called on the event loop, or through `run_sync` when given, e.g. to
+    run them in the thread of a framework's synchronous code.
+    """
+    configuration = HireFire.configuration
+    start_refresher(configuration)
+    data = [
+        refreshed_worker_data(worker) or await read_cached_worker(worker)
+        for worker in configuration.workers
+    ]
+    measured = iter(
+        await measure_workers(
+            configuration,
+            [
+                worker
+                for worker, worker_info in zip(configuration.workers, data)
+                if worker_info is None
+            ],
+            run_sync,
+        )
+    )
+    data = [worker_info or next(measured) for worker_info in data]
+
+    return [worker_info for worker_info in data if worker_info is not None]
+
+
+def start_refresher(configuration):
+    refresher = configuration.refresher
+
+    if not refresher.running and refresher.enabled:
+        refresher.start(worker_executor(), asynchronous=True)
+
+
+async def read_cached_worker(worker):
+    if worker.ttl is not None:
+        return cached_worker_data(worker, await worker.async_last(), revalidate_worker)
+
+
+def revalidate_worker(worker):
+    if worker.asynchronous:
+        worker.schedule(revalidate=True)
+    else:
+        worker.submit(worker_executor(), revalidate=True)
+
+
+async def measure_workers(configuration, workers, run_sync=None):
+    if configuration.worker_concurrency > 1 or has_worker_deadlines(configuration):
+        return await asyncio.gather(
+            *[wait_for_worker(worker, timed=True) for worker in workers]
+        )
+
+    # Workers whose evaluation is shared between concurrent requests are awaited like when
+    # they're evaluated concurrently.
+    return [
+        await (
+            wait_for_worker(worker)
+            if shares_evaluation(worker)
+            else evaluate_worker(worker, run_sync)
+        )
+        for worker in workers
+    ]
+
+
+async def evaluate_worker(worker, run_sync=None):
+    try:
+        if run_sync is None or worker.asynchronous:
+            value = worker.value()
+        else:
+            value = await run_sync(worker.value)
 
-    for worker in HireFire.configuration.workers:
-        value = worker.value()
         if asyncio.iscoroutine(value):
             value = await value
-        data.append({"name": worker.name, "value": value})
+    except Exception as e:
+        return stale_worker_data(worker, e, await worker.async_last())
+
+    await worker.async_record(value)
+    return worker_data(worker, value)
+
+
+async def wait_for_worker(worker, timed=False):
+    # Coroutine procs run on the event loop. Other procs may block, so they run on the worker
+    # executor. Evaluations are shielded, so that a worker that misses its deadline keeps being
+    # evaluated in the background, and its value is recorded for later requests. The deadline
+    # starts when the evaluation is submitted.
+    if worker.asynchronous:
+        evaluation = asyncio.shield(worker.schedule())
+    else:
+        evaluation = asyncio.shield(
+            asyncio.wrap_future(worker.submit(worker_executor()))
+        )
+
+    deadline = worker_deadline(worker, time.monotonic()) if timed else None
+
+    try:
+        if deadline is None:
+            value = await evaluation
+        else:
+            value = await asyncio.wait_for(
+                evaluation, max(deadline - time.monotonic(), 0)
+            )
+
+        if asyncio.iscoroutine(value):
+            value = await value
+            await worker.async_record(value)
+    except asyncio.TimeoutError:
+        return stale_worker_data(
+            worker, "it didn't finish before its deadline", await worker.async_last()
+        )
+    except Exception as e:
+        return stale_worker_data(worker, e, await worker.async_last())
+
+    if value is None:
+        return stale_worker_data(
+            worker, "another process is measuring it", await worker.async_last()
+        )
 
-    return data
+    return worker_data(worker, value)
@@ -1,4 +1,4 @@
-from hirefire_resource.middleware.asgi import RequestInfo, request
+from hirefire_resource.middleware.asgi import extract_request_info, lifespan, request
 
 
 class HireFireMiddleware:
@@ -6,20 +6,12 @@ class HireFireMiddleware:
         self.original_app = app.asgi_app
 
     async def __call__(self, scope, receive, send):
-        if scope["type"] == "http":
-            token = None
-            for header_name, header_value in scope["headers"]:
-                if header_name.lower() == b"hirefire-token":
-                    token = header_value.decode("utf-8")
-                    break
+        if scope["type"] == "lifespan":
+            await lifespan(self.original_app, scope, receive, send)
+            return
 
-            response = await request(
-                RequestInfo(
-                    path=scope["path"],
-                    request_start_time=self.extract_request_start_time(scope),
-                    token=token,
-                )
-            )
+        if scope["type"] == "http":
+            response = await request(extract_request_info(scope))
 
             if response:
                 await self.send_response(send, *response)
@@ -44,9 +36,3 @@ class HireFireMiddleware:
                 "body": body.encode("utf-8"),
             }
         )
-
-    def extract_request_start_time(self, scope):
-        for header_name, header_value in scope["headers"]:
-            if header_name.lower() == b"x-request-start":
-                return int(header_value.decode("utf-8"))
-        return None
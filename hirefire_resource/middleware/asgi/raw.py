@@ -0,0 +1,47 @@
+from hirefire_resource.middleware.asgi import (
+    INFO_RESPONSE_HEADERS,
+    extract_request_info,
+    info_response_body,
+    lifespan,
+    request_matcher,
+)
+
+
+class HireFireMiddleware:
+    """
+    ASGI middleware for any ASGI application or server, without framework dependencies.
+
+    Wraps the ASGI application: `app = HireFireMiddleware(app)`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await lifespan(self.app, scope, receive, send)
+            return
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_info = extract_request_info(scope)
+        matcher = request_matcher()
+        matcher.process_request_queue_time(request_info)
+
+        if not matcher.matches(request_info):
+            await self.app(scope, receive, send)
+            return
+
+        body = await info_response_body()
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": INFO_RESPONSE_HEADERS
+                + [(b"content-length", str(len(body)).encode("latin-1"))],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,19 +1,38 @@
 import json
+import time
+from concurrent.futures import TimeoutError
 
 from hirefire_resource import HireFire
 from hirefire_resource.middleware import (  # noqa
     RequestInfo,
+    cached_worker_data,
+    has_worker_deadlines,
     matches_hirefire_path,
     matches_info_path,
     process_request_queue_time,
+    refreshed_worker_data,
+    request_matcher,
+    shares_evaluation,
+    stale_worker_data,
+    worker_data,
+    worker_deadline,
+    worker_executor,
 )
 from hirefire_resource.version import VERSION
 
+# Static headers of the info response, in the form expected by `start_response`.
+INFO_RESPONSE_HEADERS = [
+    ("Content-Type", "application/json"),
+    ("Cache-Control", "must-revalidate, private, max-age=0"),
+    ("HireFire-Resource", f"Python-{VERSION}"),
+]
+
 
 def request(request_info):
-    process_request_queue_time(request_info)
+    matcher = request_matcher()
+    matcher.process_request_queue_time(request_info)
 
-    if matches_hirefire_path(request_info) or matches_info_path(request_info):
+    if matcher.matches(request_info):
         return construct_info_response()
 
 
@@ -27,8 +46,105 @@ def construct_info_response():
     return 200, headers, [body]
 
 
+def info_response_body():
+    return json.dumps(collect_workers_data()).encode("utf-8")
+
+
 def collect_workers_data():
+    configuration = HireFire.configuration
+    start_refresher(configuration)
+    data = [
+        refreshed_worker_data(worker) or read_cached_worker(worker)
+        for worker in configuration.workers
+    ]
+    measured = iter(
+        measure_workers(
+            configuration,
+            [
+                worker
+                for worker, worker_info in zip(configuration.workers, data)
+                if worker_info is None
+            ],
+        )
+    )
+    data = [worker_info or next(measured) for worker_info in data]
+
+    return [worker_info for worker_info in data if worker_info is not None]
+
+
+def start_refresher(configuration):
+    refresher = configuration.refresher
+
+    if not refresher.running and refresher.enabled:
+        refresher.start(worker_executor())
+
+
+def read_cached_worker(worker):
+    if worker.ttl is not None:
+        return cached_worker_data(worker, worker.last(), revalidate_worker)
+
+
+def revalidate_worker(worker):
+    worker.submit(worker_executor(), revalidate=True)
+
+
+def measure_workers(configuration, workers):
+    concurrently = has_worker_deadlines(configuration) or (
+        len(workers) > 1 and configuration.worker_concurrency > 1
+    )
+    executor = worker_executor()
+    # Workers whose evaluation is shared between concurrent requests are evaluated on the
+    # executor, even when others are evaluated one after another in the request's thread. The
+    # deadline of each worker starts when its evaluation is submitted.
+    submitted = [
+        (
+            (worker.submit(executor), time.monotonic())
+            if concurrently or shares_evaluation(worker)
+            else None
+        )
+        for worker in workers
+    ]
+
     return [
-        {"name": worker.name, "value": worker.value()}
-        for worker in HireFire.configuration.workers
+        (
+            evaluate_worker(worker)
+            if evaluation is None
+            else wait_for_worker(
+                worker, evaluation[0], worker_deadline(worker, evaluation[1])
+            )
+        )
+        for worker, evaluation in zip(workers, submitted)
     ]
+
+
+def evaluate_worker(worker):
+    try:
+        value = worker.value()
+    except Exception as e:
+        return stale_worker_data(worker, e, worker.last())
+
+    worker.record(value)
+    return worker_data(worker, value)
+
+
+def wait_for_worker(worker, future, deadline):
+    # A worker that misses its deadline keeps being evaluated in the background, and its value
+    # is recorded for later requests once it completes.
+    try:
+        if deadline is None:
+            value = future.result()
+        else:
+            value = future.result(max(deadline - time.monotonic(), 0))
+    except TimeoutError:
+        return stale_worker_data(
+            worker, "it didn't finish before its deadline", worker.last()
+        )
+    except Exception as e:
+        return stale_worker_data(worker, e, worker.last())
+
+    if value is None:
+        return stale_worker_data(
+            worker, "another process is measuring it", worker.last()
+        )
+
+    return worker_data(worker, value)
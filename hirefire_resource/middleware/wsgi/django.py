@@ -1,26 +1,76 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.http import HttpResponse
 
+from hirefire_resource.middleware import asgi
 from hirefire_resource.middleware.wsgi import RequestInfo, request
 
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+    iscoroutinefunction = asyncio.iscoroutinefunction
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
 
 class HireFireMiddleware:
+    """
+    Django middleware that runs natively in both synchronous and asynchronous mode.
+
+    Django passes an asynchronous `get_response` when the middleware chain runs asynchronously,
+    e.g. under ASGI with async views. The middleware then handles requests as a coroutine and
+    awaits async worker procs, instead of having Django run it in a thread. Other worker procs
+    run in Django's thread for synchronous code, so that they can use the ORM.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, req):
-        response_data = request(
-            RequestInfo(
-                path=req.path,
-                request_start_time=req.META.get("HTTP_X_REQUEST_START"),
-                token=req.META.get("HTTP_HIREFIRE_TOKEN"),
-            )
-        )
+        if self.async_mode:
+            return self.__acall__(req)
+
+        response_data = request(self.request_info(req))
 
         if response_data:
-            status, headers, body = response_data
-            response = HttpResponse(content=body, status=status)
-            for key, value in headers.items():
-                response[key] = value
-            return response
+            return self.construct_response(response_data)
 
         return self.get_response(req)
+
+    async def __acall__(self, req):
+        response_data = await asgi.request(self.request_info(req), self.run_sync)
+
+        if response_data:
+            return self.construct_response(response_data)
+
+        return await self.get_response(req)
+
+    @staticmethod
+    async def run_sync(func):
+        return await sync_to_async(func, thread_sensitive=True)()
+
+    @staticmethod
+    def request_info(req):
+        return RequestInfo(
+            path=req.path,
+            request_start_time=req.META.get("HTTP_X_REQUEST_START"),
+            token=req.META.get("HTTP_HIREFIRE_TOKEN"),
+        )
+
+    @staticmethod
+    def construct_response(response_data):
+        status, headers, body = response_data
+        response = HttpResponse(content=body, status=status)
+        for key, value in headers.items():
+            response[key] = value
+        return response
@@ -1,6 +1,10 @@
 from flask import Response
 
-from hirefire_resource.middleware.wsgi import RequestInfo, request
+from hirefire_resource.middleware.wsgi import (
+    RequestInfo,
+    construct_info_response,
+    request_matcher,
+)
 
 
 class HireFireMiddleware:
@@ -9,17 +13,20 @@ class HireFireMiddleware:
         self.original_wsgi_app = app.wsgi_app
 
     def __call__(self, environ, start_response):
-        with self.app.request_context(environ):
-            response = request(
-                RequestInfo(
-                    path=environ.get("PATH_INFO"),
-                    request_start_time=environ.get("HTTP_X_REQUEST_START"),
-                    token=environ.get("HTTP_HIREFIRE_TOKEN"),
-                )
-            )
+        # Requests are matched straight from the environ, since the application builds its own
+        # request context for requests passed through to it. A request context is only pushed
+        # to serve the info response, so that worker procs can use the application context.
+        request_info = RequestInfo(
+            path=environ.get("PATH_INFO"),
+            request_start_time=environ.get("HTTP_X_REQUEST_START"),
+            token=environ.get("HTTP_HIREFIRE_TOKEN"),
+        )
+        matcher = request_matcher()
+        matcher.process_request_queue_time(request_info)
 
-            if response:
-                status, headers, body = response
+        if matcher.matches(request_info):
+            with self.app.request_context(environ):
+                status, headers, body = construct_info_response()
                 response = Response(body, status=status, headers=headers)
                 return response(environ, start_response)
 
@@ -0,0 +1,36 @@
+from hirefire_resource.middleware.wsgi import (
+    INFO_RESPONSE_HEADERS,
+    RequestInfo,
+    info_response_body,
+    request_matcher,
+)
+
+
+class HireFireMiddleware:
+    """
+    WSGI middleware for any WSGI application or server, without framework dependencies.
+
+    Wraps the WSGI application: `app = HireFireMiddleware(app)`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        request_info = RequestInfo(
+            path=environ.get("PATH_INFO"),
+            request_start_time=environ.get("HTTP_X_REQUEST_START"),
+            token=environ.get("HTTP_HIREFIRE_TOKEN"),
+        )
+        matcher = request_matcher()
+        matcher.process_request_queue_time(request_info)
+
+        if matcher.matches(request_info):
+            body = info_response_body()
+            start_response(
+                "200 OK",
+                INFO_RESPONSE_HEADERS + [("Content-Length", str(len(body)))],
+            )
+            return [body]
+
+        return self.app(environ, start_response)
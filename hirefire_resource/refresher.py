@@ -0,0 +1,367 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+from hirefire_resource.dispatch_policy import DispatchPolicy
+
+
+def _reinitialize_after_fork(reference):
+    refresher = reference()
+
+    if refresher:
+        refresher._reinitialize_after_fork()
+
+
+class Refresher:
+    """
+    Measures workers in the background, each on its own refresh interval, and keeps their
+    latest values in an in-memory snapshot. The info response is served from the snapshot
+    without evaluating any proc.
+
+    A worker is refreshed every `refresh_interval` seconds, as passed to `dyno`, or otherwise
+    every `Configuration.refresh_interval` seconds. Workers without either aren't refreshed in
+    the background. Intervals are randomized by `jitter` (a fraction of the interval). After a
+    failed evaluation the interval doubles with every consecutive failure, up to `max_backoff`
+    seconds, and the worker's last value is flagged as stale until an evaluation succeeds.
+
+    A refresh is bounded by the worker's `timeout`, as passed to `dyno`, and by
+    `Configuration.info_timeout`. A refresh that misses its deadline counts as a failed one. It
+    keeps running in the background, and the worker's next refresh waits on it again instead of
+    starting another evaluation. A value that wasn't refreshed for `STALE_INTERVALS` intervals
+    is flagged as stale as well.
+
+    The refresher runs in a thread, or as a task on the running event loop when started with
+    `asynchronous=True`. A forked process starts its own refresher, and serves the values
+    measured by its parent until its first refresh.
+    """
+
+    STALE_INTERVALS = 3
+
+    def __init__(self, configuration, jitter=0.1, max_backoff=300):
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self._configuration = configuration
+        self._snapshot = {}
+        self._due = {}
+        self._deadlines = {}
+        self._evaluations = {}
+        self._policies = {}
+        self._mutex = threading.Lock()
+        self._wakeup = threading.Event()
+        self._async_wakeup = None
+        self._running = False
+        self._runner = None
+        self._executor = None
+
+        if hasattr(os, "register_at_fork"):
+            reference = weakref.ref(self)
+            os.register_at_fork(
+                after_in_child=lambda: _reinitialize_after_fork(reference)
+            )
+
+    @property
+    def enabled(self):
+        return any(
+            self.interval(worker) is not None for worker in self._configuration.workers
+        )
+
+    @property
+    def running(self):
+        runner = self._runner
+
+        # A task stops running with its event loop, e.g. one created for a single request.
+        if isinstance(runner, asyncio.Task):
+            return self._running and not (
+                runner.done() or runner.get_loop().is_closed()
+            )
+
+        return self._running
+
+    def interval(self, worker):
+        if worker.refresh_interval is not None:
+            return worker.refresh_interval
+
+        return self._configuration.refresh_interval
+
+    def timeout(self, worker):
+        timeouts = [
+            timeout
+            for timeout in (worker.timeout, self._configuration.info_timeout)
+            if timeout is not None
+        ]
+
+        return min(timeouts) if timeouts else None
+
+    def get(self, worker):
+        """
+        Returns the worker's last refreshed value, the time it was measured at and whether it's
+        stale, as a tuple, or None. A value is stale when its last refresh failed, or when it
+        wasn't refreshed for `STALE_INTERVALS` intervals.
+        """
+        interval = self.interval(worker)
+
+        if interval is None:
+            return None
+
+        entry = self._snapshot.get(worker.name)
+
+        if entry is None or entry[2]:
+            return entry
+        if time.time() - entry[1] > interval * self.STALE_INTERVALS:
+            return (entry[0], entry[1], True)
+
+        return entry
+
+    def snapshot(self):
+        return dict(self._snapshot)
+
+    def start(self, executor, asynchronous=False):
+        """
+        Starts refreshing workers, evaluating procs that aren't coroutine functions on
+        `executor`. Returns False when the refresher is already running.
+        """
+        with self._mutex:
+            if self.running:
+                return False
+
+            self._running = True
+            self._executor = executor
+            self._due = {}
+            self._deadlines = {}
+            self._evaluations = {}
+
+            if asynchronous:
+                self._runner = asyncio.get_running_loop().create_task(self._run_async())
+            else:
+                self._runner = threading.Thread(
+                    target=self._run, name="hirefire-refresher", daemon=True
+                )
+                self._runner.start()
+
+        self._configuration.logger.info("[HireFire] Started refreshing workers.")
+        return True
+
+    def stop(self, timeout=5):
+        with self._mutex:
+            if not self._running:
+                return False
+
+            self._running = False
+            runner = self._runner
+            self._runner = None
+
+        self._wake(runner)
+
+        if isinstance(runner, asyncio.Task):
+            loop = runner.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(runner.cancel)
+        elif runner is not threading.current_thread():
+            runner.join(timeout)
+
+        self._configuration.logger.info("[HireFire] Stopped refreshing workers.")
+        return True
+
+    def _run(self):
+        while self._running:
+            self._wakeup.clear()
+            self._wakeup.wait(self._refresh_due_workers(asynchronous=False))
+
+    async def _run_async(self):
+        self._async_wakeup = asyncio.Event()
+
+        while self._running:
+            self._async_wakeup.clear()
+
+            try:
+                await asyncio.wait_for(
+                    self._async_wakeup.wait(),
+                    self._refresh_due_workers(asynchronous=True),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def _refresh_due_workers(self, asynchronous):
+        """
+        Starts evaluating the workers that are due, and returns the number of seconds until the
+        next one is, or until an evaluation's deadline, or None when there's neither.
+        """
+        now = time.monotonic()
+        wait = None
+
+        for worker in self._configuration.workers:
+            if self.interval(worker) is None:
+                continue
+
+            name = worker.name
+            due = self._due.get(name, now)
+
+            if due is None:
+                deadline = self._deadlines.get(name)
+
+                if deadline is None:
+                    continue  # Being evaluated without a deadline.
+                if deadline > now:
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                    continue
+
+                due = self._timed_out(worker)
+
+            if due <= now:
+                self._evaluate(worker, asynchronous)
+                due = self._deadlines.get(name)
+
+                if due is None:
+                    continue
+
+            if wait is None or due - now < wait:
+                wait = due - now
+
+        return wait
+
+    def _evaluate(self, worker, asynchronous):
+        name = worker.name
+        evaluation = self._evaluations.get(name)
+        timeout = self.timeout(worker)
+        self._due[name] = None
+
+        if timeout is None:
+            self._deadlines.pop(name, None)
+        else:
+            self._deadlines[name] = time.monotonic() + timeout
+
+        # An evaluation that missed its deadline is waited on again rather than started anew, so
+        # that a hung proc only ever holds a single thread.
+        if evaluation is not None and not evaluation.done():
+            return
+
+        try:
+            if asynchronous and worker.asynchronous:
+                evaluation = worker.schedule()
+            elif asynchronous:
+                evaluation = asyncio.wrap_future(worker.submit(self._executor))
+            elif worker.asynchronous:
+                evaluation = self._executor.submit(self._evaluate_coroutine, worker)
+            else:
+                evaluation = worker.submit(self._executor)
+        except RuntimeError:
+            # The executor was shut down, e.g. while the interpreter exits.
+            self._running = False
+            return
+
+        runner = self._runner
+        self._evaluations[name] = evaluation
+        evaluation.add_done_callback(
+            lambda evaluation: self._refreshed(worker, evaluation, runner)
+        )
+
+    @staticmethod
+    def _evaluate_coroutine(worker):
+        return asyncio.run(worker._async_refresh())
+
+    def _refreshed(self, worker, future, runner):
+        if runner is not self._runner:
+            return  # Evaluation started by a refresher that has since been stopped.
+
+        name = worker.name
+        interval = self.interval(worker)
+
+        if future.cancelled() or interval is None:
+            self._due.pop(name, None)
+            self._deadlines.pop(name, None)
+            return
+
+        # An evaluation that missed its deadline was already counted as a failed refresh, and
+        # the worker was rescheduled. Its value is still kept once it completes.
+        awaited = self._due.get(name, 0) is None
+        policy = self._policy(worker, interval)
+
+        try:
+            value = future.result()
+            if asyncio.iscoroutine(value):
+                value.close()
+                raise TypeError("its proc returned a coroutine")
+        except Exception as e:
+            if not awaited:
+                return
+
+            delay = self._failed(worker, policy, interval, e)
+        else:
+            policy.record_success()
+            delay = policy.interval(interval)
+            self._snapshot[name] = (value, time.time(), False)
+
+            if not awaited:
+                return
+
+        self._deadlines.pop(name, None)
+        self._due[name] = time.monotonic() + delay
+        self._wake(runner)
+
+    def _timed_out(self, worker):
+        """
+        Counts an evaluation that missed its deadline as a failed refresh, and returns the
+        monotonic time at which the worker is due again.
+        """
+        name = worker.name
+        interval = self.interval(worker)
+        delay = self._failed(
+            worker,
+            self._policy(worker, interval),
+            interval,
+            "it didn't finish before its deadline",
+        )
+        due = self._due[name] = time.monotonic() + delay
+        self._deadlines.pop(name, None)
+
+        return due
+
+    def _policy(self, worker, interval):
+        policy = self._policies.get(worker.name)
+
+        if policy is None:
+            policy = self._policies[worker.name] = DispatchPolicy(
+                jitter=self.jitter, max_interval=max(self.max_backoff, interval)
+            )
+
+        return policy
+
+    def _failed(self, worker, policy, interval, reason):
+        name = worker.name
+        policy.record_failure(interval)
+        delay = policy.interval(interval)
+        entry = self._snapshot.get(name)
+
+        if entry is not None:
+            self._snapshot[name] = (entry[0], entry[1], True)
+
+        self._configuration.logger.error(
+            f"[HireFire] Unable to refresh {name}: {reason}. "
+            f"Retrying in {delay:.1f} seconds."
+        )
+
+        return delay
+
+    def _wake(self, runner):
+        if isinstance(runner, asyncio.Task):
+            loop = runner.get_loop()
+            if self._async_wakeup is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._async_wakeup.set)
+        else:
+            self._wakeup.set()
+
+    def _reinitialize_after_fork(self):
+        # The child only inherits the thread that forked, so the refresher isn't running here,
+        # and the mutex may have been held by another thread. The snapshot is kept, and served
+        # until the refresher is started again by the child's first info request.
+        self._mutex = threading.Lock()
+        self._wakeup = threading.Event()
+        self._async_wakeup = None
+        self._running = False
+        self._runner = None
+        self._executor = None
+        self._due = {}
+        self._deadlines = {}
+        self._evaluations = {}
@@ -0,0 +1,323 @@
+import mmap
+import os
+import tempfile
+import threading
+from array import array
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+from hirefire_resource.histogram import Histogram
+
+_MAGIC = 0x4846574542303031  # "HFWEB001"
+
+# Header fields, stored as int64 values at the start of the file.
+_HEADER_MAGIC = 0
+_HEADER_SLOTS_USED = 1
+_HEADER_LAST_COLLECTED = 2
+_HEADER_SIZE = 4
+
+# Each ring entry holds one second of one process' samples.
+_ENTRY_TIMESTAMP = 0
+_ENTRY_COUNT = 1
+_ENTRY_SUM = 2
+_ENTRY_MIN = 3
+_ENTRY_MAX = 4
+_ENTRY_BUCKETS = 5
+_ENTRY_SIZE = _ENTRY_BUCKETS + Histogram.BUCKETS
+
+# Byte offsets used for fcntl record locks. They don't overlap with any data.
+_LOCK_LEADER = 0
+_LOCK_INIT = 1
+_LOCK_SLOTS = 8
+
+
+class _SharedFile:
+    """
+    The descriptor and memory map of a shared buffer's file, shared by every `SharedBuffer` of a
+    process that uses that file.
+
+    fcntl locks are held by the process rather than by the descriptor, and closing any
+    descriptor of the file releases all of them, including the one an mmap keeps. The buffers of
+    a process therefore share a single descriptor and map, which are closed once the last of
+    them detaches, and keep track of the locks each of them holds, so that two buffers never
+    both hold the same lock.
+    """
+
+    def __init__(self, key, fd):
+        self.key = key
+        self.fd = fd
+        self.mapping = None
+        self.view = None
+        self.users = 0
+        self._locked = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, offset):
+        with self._lock:
+            if offset in self._locked:
+                return False
+
+            try:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+            except OSError:
+                return False
+
+            self._locked.add(offset)
+            return True
+
+    def release(self, offset):
+        with self._lock:
+            if offset in self._locked:
+                self._locked.discard(offset)
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, offset)
+
+    def map(self, size):
+        self.mapping = mmap.mmap(self.fd, size)
+        self.view = memoryview(self.mapping).cast("q")
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.mapping.close()
+            self.view = None
+            self.mapping = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+def _reinitialize_after_fork():
+    # The child holds none of its parent's locks. The inherited descriptors and maps are closed
+    # before the child takes any lock, as closing them afterwards would release the child's locks
+    # too.
+    global _files_lock
+
+    _files_lock = threading.Lock()
+
+    for shared_file in _files.values():
+        shared_file.close()
+
+    _files.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinitialize_after_fork)
+
+
+class SharedBuffer:
+    """
+    Aggregates request queue times from every process on a dyno into a single memory-mapped file,
+    so that one elected process can dispatch them on behalf of all others.
+
+    Each process claims its own slot in the file, which holds a ring of per-second histograms that
+    only that process writes to. The slot is held with an fcntl lock, so it's released by the
+    kernel when the process exits or crashes. Samples already written by a crashed process are
+    still collected.
+
+    Leadership is held with another fcntl lock. The leader collects completed seconds from every
+    slot. When it exits, the next process that calls `lead` takes over and resumes from the last
+    collected second, which is stored in the file.
+
+    Buffers of the same process that use the same file share its descriptor, and otherwise
+    behave like buffers of different processes: each claims its own slot, and only one of them
+    leads.
+    """
+
+    SLOTS = 64
+    RING = 64
+
+    def __init__(self, path=None):
+        self.path = path
+        self._pid = None
+        self._file = None
+        self._slot = None
+        self._view = None
+        self._region = None
+        self._leader = False
+        self._zeros = array("q", [0] * (_ENTRY_SIZE - 1))
+
+    def add(self, timestamp, value):
+        if self._pid != os.getpid() and not self._attach():
+            return False
+
+        view = self._view
+        base = self._region + (timestamp % self.RING) * _ENTRY_SIZE
+
+        if view[base] != timestamp:
+            view[base + 1 : base + _ENTRY_SIZE] = self._zeros
+            view[base] = timestamp
+
+        count = view[base + _ENTRY_COUNT]
+        view[base + _ENTRY_COUNT] = count + 1
+        view[base + _ENTRY_SUM] += value
+
+        if not count or value < view[base + _ENTRY_MIN]:
+            view[base + _ENTRY_MIN] = value
+        if not count or value > view[base + _ENTRY_MAX]:
+            view[base + _ENTRY_MAX] = value
+
+        view[
+            base + _ENTRY_BUCKETS + min(value.bit_length(), Histogram.BUCKETS - 1)
+        ] += 1
+        return True
+
+    def lead(self):
+        if self._pid != os.getpid() and not self._attach():
+            return False
+
+        if not self._leader:
+            self._leader = self._file.acquire(_LOCK_LEADER)
+
+        return self._leader
+
+    def release(self):
+        if self._leader and self._pid == os.getpid():
+            self._file.release(_LOCK_LEADER)
+        self._leader = False
+
+    def collect(self, now):
+        """
+        Returns the histograms of every second that completed since the last collection, keyed by
+        timestamp. Only the leader may collect.
+
+        The current and previous second are left in place, as requests that started just before a
+        second boundary may still be recording into them.
+        """
+        view = self._view
+        until = now - 2
+        since = max(view[_HEADER_LAST_COLLECTED], until - self.RING + 2)
+        buffer = {}
+
+        for slot in range(view[_HEADER_SLOTS_USED]):
+            region = _HEADER_SIZE + slot * self.RING * _ENTRY_SIZE
+
+            for base in range(region, region + self.RING * _ENTRY_SIZE, _ENTRY_SIZE):
+                timestamp = view[base]
+
+                if since < timestamp <= until and view[base + _ENTRY_COUNT]:
+                    histogram = Histogram()
+                    histogram.count = view[base + _ENTRY_COUNT]
+                    histogram.sum = view[base + _ENTRY_SUM]
+                    histogram.min = view[base + _ENTRY_MIN]
+                    histogram.max = view[base + _ENTRY_MAX]
+                    histogram.buckets = view[
+                        base + _ENTRY_BUCKETS : base + _ENTRY_SIZE
+                    ].tolist()
+
+                    if timestamp in buffer:
+                        buffer[timestamp].extend(histogram)
+                    else:
+                        buffer[timestamp] = histogram
+
+        view[_HEADER_LAST_COLLECTED] = max(view[_HEADER_LAST_COLLECTED], until)
+        return buffer
+
+    def _attach(self):
+        # Runs once per process, including after a fork, since fcntl locks aren't inherited.
+        self._detach()
+
+        if not FCNTL_AVAILABLE:
+            return False
+
+        path = self.path or os.path.join(
+            "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+            f"hirefire-web-{os.getpgrp()}",
+        )
+        size = (_HEADER_SIZE + self.SLOTS * self.RING * _ENTRY_SIZE) * 8
+
+        with _files_lock:
+            key = (os.path.realpath(path), os.getpid())
+            shared_file = _files.get(key)
+
+            if shared_file is None:
+                shared_file = _files[key] = _SharedFile(
+                    key, os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+                )
+
+            shared_file.users += 1
+            fd = shared_file.fd
+
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, 1, _LOCK_INIT)
+                try:
+                    if shared_file.view is None:
+                        if os.fstat(fd).st_size != size:
+                            os.ftruncate(fd, 0)
+                            os.ftruncate(fd, size)
+
+                        shared_file.map(size)
+
+                    view = shared_file.view
+
+                    if view[_HEADER_MAGIC] != _MAGIC:
+                        view[_HEADER_SLOTS_USED] = 0
+                        view[_HEADER_LAST_COLLECTED] = 0
+                        view[_HEADER_MAGIC] = _MAGIC
+
+                    slot = self._claim_slot(shared_file)
+
+                    if slot is not None:
+                        view[_HEADER_SLOTS_USED] = max(
+                            view[_HEADER_SLOTS_USED], slot + 1
+                        )
+                finally:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, _LOCK_INIT)
+            except Exception:
+                self._close_file(shared_file)
+                raise
+
+            if slot is None:
+                self._close_file(shared_file)
+                return False
+
+        self._pid = os.getpid()
+        self._file = shared_file
+        self._slot = slot
+        self._view = view
+        self._region = _HEADER_SIZE + slot * self.RING * _ENTRY_SIZE
+        return True
+
+    def _claim_slot(self, shared_file):
+        for slot in range(self.SLOTS):
+            if shared_file.acquire(_LOCK_SLOTS + slot):
+                return slot
+        return None
+
+    @staticmethod
+    def _close_file(shared_file):
+        # Called with `_files_lock` held.
+        shared_file.users -= 1
+
+        if not shared_file.users:
+            shared_file.close()
+            _files.pop(shared_file.key, None)
+
+    def _detach(self):
+        # The descriptor and map of a buffer inherited from the parent process were already
+        # closed after the fork, and the parent's locks aren't held here.
+        if self._file is not None and self._pid == os.getpid():
+            self.release()
+            self._file.release(_LOCK_SLOTS + self._slot)
+
+            with _files_lock:
+                self._close_file(self._file)
+
+        self._pid = None
+        self._file = None
+        self._slot = None
+        self._view = None
+        self._region = None
+        self._leader = False
+
+    def close(self):
+        self._detach()
@@ -1,97 +1,541 @@
+import asyncio
+import atexit
 import http.client
+import io
 import json
 import os
 import re
 import socket
+import sys
 import threading
 import time
-from datetime import datetime
+import weakref
+from collections import deque
 
+from hirefire_resource.dispatch_policy import DispatchPolicy
+from hirefire_resource.dispatch_stats import DispatchStats
+from hirefire_resource.histogram import Histogram
+from hirefire_resource.shared import SharedBuffer
 from hirefire_resource.version import VERSION
 
 
 class DispatchError(Exception):
-    pass
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class _AsyncResponse:
+    def __init__(self, status, reason, headers, will_close):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.will_close = will_close
+
+
+def _clock():
+    # Looked up on every call rather than bound once, so that patching `time.time_ns` (e.g. with
+    # freezegun) applies to instances that were created earlier.
+    return time.time_ns()
+
+
+def _milliseconds(nanoseconds):
+    return None if nanoseconds is None else nanoseconds / 1_000_000
+
+
+def _reinitialize_after_fork(reference):
+    web = reference()
+
+    if web:
+        web._reinitialize_after_fork()
 
 
 class Web:
-    def __init__(self, configuration):
+    def __init__(
+        self,
+        configuration,
+        aggregate=False,
+        sharded=False,
+        async_dispatcher=False,
+        shared=False,
+        flush_threshold=None,
+        clock=None,
+    ):
+        self.clock = clock or _clock
         self._buffer = {}
+        self._bucket_factory = Histogram if aggregate or shared else list
         self._mutex = threading.Lock()
+        self._shards = [] if sharded and not shared else None
+        self._shared = (
+            SharedBuffer(None if shared is True else shared) if shared else None
+        )
+        self._shard_local = threading.local()
+        self._connection = None
+        self._connection_host = None
+        self._samples = 0
+        self._flush_threshold = flush_threshold
+        self._wakeup = threading.Event()
+        self._async_wakeup = None
+        self._parked = False
         self._dispatcher_running = False
         self._dispatcher = None
+        self._async_dispatcher = async_dispatcher
+        self._async_connection = None
+        self._async_connection_host = None
+        self._dispatch_policy = DispatchPolicy()
+        self._stats = DispatchStats()
         self._dispatch_interval = 1
         self._dispatch_timeout = 5
         self._buffer_ttl = 60
+        self._shutdown_hooks_registered = False
         self._configuration = configuration
 
+        if hasattr(os, "register_at_fork"):
+            reference = weakref.ref(self)
+            os.register_at_fork(
+                after_in_child=lambda: _reinitialize_after_fork(reference)
+            )
+
     def start_dispatcher(self):
+        if self.dispatcher_running():
+            return False
+
         with self._mutex:
-            if self._dispatcher_running:
+            if self.dispatcher_running():
                 return False
             self._dispatcher_running = True
 
+        if isinstance(self._dispatcher, asyncio.Task):
+            # Replaces a task that stopped with its event loop. The connection was opened on
+            # that loop, so it can't be used or closed from another one.
+            self._async_connection = None
+            self._async_connection_host = None
+
         self._logger.info("[HireFire] Starting web metrics dispatcher.")
-        self._dispatcher = threading.Thread(target=self._start_dispatcher)
+        self._register_shutdown_hooks()
+
+        if self._async_dispatcher:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self._dispatcher = loop.create_task(self._start_async_dispatcher())
+                return True
+
+        self._dispatcher = threading.Thread(target=self._start_dispatcher, daemon=True)
         self._dispatcher.start()
         return True
 
-    def stop_dispatcher(self):
+    def stop_dispatcher(self, timeout=None):
         with self._mutex:
             if not self._dispatcher_running:
                 return False
             self._dispatcher_running = False
 
-        if self._dispatcher:
-            self._dispatcher.join(self._dispatch_timeout)
-            self._dispatcher = None
+        if timeout is None:
+            timeout = self._dispatch_timeout
+
+        deadline = time.monotonic() + timeout
+        dispatcher = self._dispatcher
+        self._wake_dispatcher()
+        self._dispatcher = None
+
+        if isinstance(dispatcher, asyncio.Task):
+            loop = dispatcher.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(dispatcher.cancel)
+        elif dispatcher and dispatcher is not threading.current_thread():
+            dispatcher.join(max(deadline - time.monotonic(), 0))
+
+        if isinstance(dispatcher, threading.Thread) and dispatcher.is_alive():
+            self._logger.error(
+                "[HireFire] Web metrics dispatcher didn't stop in time. "
+                "Remaining web metrics were not dispatched."
+            )
+        else:
+            self._dispatch_buffer(timeout=deadline - time.monotonic())
+
+        self._close_connection()
+
+        if self._shared:
+            with self._mutex:
+                self._shared.release()
 
-        self._flush_buffer()
         self._logger.info("[HireFire] Web metrics dispatcher stopped.")
         return True
 
-    def dispatcher_running(self):
+    async def start_async_dispatcher(self):
+        if not self._async_dispatcher:
+            return False
+
+        return self.start_dispatcher()
+
+    async def stop_async_dispatcher(self):
+        dispatcher = self._dispatcher
+
+        if not isinstance(dispatcher, asyncio.Task):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.stop_dispatcher)
+
         with self._mutex:
-            return self._dispatcher_running
+            if not self._dispatcher_running:
+                return False
+            self._dispatcher_running = False
+
+        self._dispatcher = None
+        dispatcher.cancel()
+
+        try:
+            await dispatcher
+        except asyncio.CancelledError:
+            pass
+
+        try:
+            await asyncio.wait_for(
+                self._async_dispatch_buffer(), self._dispatch_timeout
+            )
+        except asyncio.TimeoutError:
+            self._logger.error(
+                "[HireFire] Timed out while dispatching remaining web metrics."
+            )
+
+        self._close_async_connection()
+        self._logger.info("[HireFire] Web metrics dispatcher stopped.")
+        return True
+
+    def dispatcher_running(self):
+        dispatcher = self._dispatcher
+
+        # A task stops running with its event loop, e.g. one created for a single request.
+        if isinstance(dispatcher, asyncio.Task):
+            return self._dispatcher_running and not (
+                dispatcher.done() or dispatcher.get_loop().is_closed()
+            )
+
+        return self._dispatcher_running
+
+    def circuit_state(self):
+        return self._dispatch_policy.state
+
+    def stats(self):
+        """
+        Returns a snapshot of the counters kept about recording and dispatching web metrics, as a
+        dictionary that can be logged or exported. Durations are in milliseconds, and the dispatch
+        latency percentiles are calculated over the most recent 1000 dispatches. The dispatch
+        interval, timeout and buffer TTL are the values currently in effect, including
+        adjustments made by the server.
+
+        Building the snapshot takes the buffer lock briefly, so call it periodically rather than
+        per request.
+        """
+        stats = self._stats
 
-    def add_to_buffer(self, request_queue_time):
         with self._mutex:
-            timestamp = int(datetime.now().timestamp())
-            self._buffer.setdefault(timestamp, []).append(request_queue_time)
+            recorded = stats.recorded + self._samples
+            buffer_seconds = len(self._buffer)
+            buffer_samples = sum(len(bucket) for bucket in self._buffer.values())
+            buffer_bytes = sys.getsizeof(self._buffer) + sum(
+                sys.getsizeof(bucket) for bucket in self._buffer.values()
+            )
+
+            if self._shards is not None:
+                recorded = stats.recorded
+                for _, samples in self._shards:
+                    recorded += len(samples)
+                    buffer_samples += len(samples)
+                    buffer_bytes += sys.getsizeof(samples)
+
+        return {
+            "samples_recorded": recorded,
+            "samples_dropped": stats.dropped,
+            "buffer_seconds": buffer_seconds,
+            "buffer_samples": buffer_samples,
+            "buffer_bytes": buffer_bytes,
+            "dispatches": stats.dispatches,
+            "dispatches_skipped": stats.skipped,
+            "dispatch_failures": dict(stats.failures),
+            "dispatch_latency_last_ms": _milliseconds(stats.latency()),
+            "dispatch_latency_p50_ms": _milliseconds(stats.latency(50)),
+            "dispatch_latency_p99_ms": _milliseconds(stats.latency(99)),
+            "lock_contentions": stats.lock_contentions,
+            "lock_wait_ms": _milliseconds(stats.lock_wait_ns),
+            "circuit_state": self.circuit_state(),
+            "dispatch_interval": self._dispatch_interval,
+            "dispatch_timeout": self._dispatch_timeout,
+            "buffer_ttl": self._buffer_ttl,
+        }
+
+    def add_to_buffer(self, request_queue_time, now=None):
+        """
+        Records a request queue time in the bucket of the second it was measured in. `now` is the
+        time of measurement in nanoseconds since the epoch, as returned by `clock`, and is read
+        from the clock when omitted. Passing the value that the queue time was calculated from
+        saves a second clock read.
+        """
+        timestamp = (self.clock() if now is None else now) // 1_000_000_000
+
+        if self._shards is not None:
+            self._shard().append((timestamp, request_queue_time))
+            # Not synchronized in sharded mode, so the count is approximate. It's only used to
+            # decide when to wake up the dispatcher.
+            samples = self._samples = self._samples + 1
+        else:
+            mutex = self._mutex
+
+            # The wait is only timed when the lock is contended, so uncontended requests don't
+            # pay for reading the clock.
+            if not mutex.acquire(False):
+                started = time.perf_counter_ns()
+                mutex.acquire()
+                self._stats.record_lock_wait(time.perf_counter_ns() - started)
+
+            try:
+                if not (
+                    self._shared and self._shared.add(timestamp, request_queue_time)
+                ):
+                    self._bucket(self._buffer, timestamp).append(request_queue_time)
+                samples = self._samples = self._samples + 1
+            finally:
+                mutex.release()
+
+        # The first sample only wakes a dispatcher that is parked, and the threshold only one
+        # that isn't backing off from failed dispatches, so new requests don't cut the backoff
+        # short.
+        if (samples == 1 and self._parked) or (
+            samples == self._flush_threshold and not self._dispatch_policy.failures
+        ):
+            self._wake_dispatcher()
+
+    def _shard(self):
+        # Each thread records into its own deque. Appending to and popping from a deque are
+        # atomic, so neither request threads nor the dispatcher need a lock to share it. The
+        # mutex is only taken once per thread to register the shard.
+        try:
+            return self._shard_local.samples
+        except AttributeError:
+            samples = self._shard_local.samples = deque()
+            with self._mutex:
+                self._shards.append((threading.current_thread(), samples))
+            return samples
 
     def _flush_buffer(self):
         with self._mutex:
             buffer = self._buffer
             self._buffer = {}
-            return buffer
+            if self._shards is None:
+                self._stats.recorded += self._samples
+            self._samples = 0
+
+        if self._shards is not None:
+            self._drain_shards(buffer)
+
+        if self._shared:
+            self._collect_shared(buffer)
+
+        return buffer
+
+    def _collect_shared(self, buffer):
+        # Every process records into the shared buffer, but only the elected leader collects and
+        # dispatches it. Other processes only dispatch samples they couldn't record into it.
+        with self._mutex:
+            leading = self._shared.lead()
+
+        if leading:
+            now = self.clock() // 1_000_000_000
+            for timestamp, histogram in self._shared.collect(now).items():
+                self._bucket(buffer, timestamp).extend(histogram)
+
+    def _drain_shards(self, buffer):
+        for _, samples in list(self._shards):
+            popleft = samples.popleft
+            while True:
+                try:
+                    timestamp, request_queue_time = popleft()
+                except IndexError:
+                    break
+                self._bucket(buffer, timestamp).append(request_queue_time)
+                self._stats.recorded += 1
+
+        with self._mutex:
+            self._shards = [
+                (thread, samples)
+                for thread, samples in self._shards
+                if thread.is_alive() or samples
+            ]
+
+    def _dispatch_buffer(self, timeout=None):
+        if not self._dispatch_policy.allow():
+            self._stats.skipped += 1
+            return
 
-    def _dispatch_buffer(self):
         buffer = self._flush_buffer()
 
         if buffer:
+            started = time.perf_counter_ns()
             try:
                 if os.environ.get("HIREFIRE_VERBOSE"):
                     self._logger.info(f"[HireFire] Dispatching web metrics: {buffer}")
-                self._submit_buffer(buffer)
+                self._submit_buffer(buffer, timeout)
+                self._dispatch_policy.record_success()
+                self._stats.record_dispatch(time.perf_counter_ns() - started)
             except Exception as e:
                 self._repopulate_buffer(buffer)
-                self._logger.error(
-                    f"[HireFire] Error while dispatching web metrics: {str(e)}"
-                )
+                self._record_dispatch_failure(e, time.perf_counter_ns() - started)
+
+    def _record_dispatch_failure(self, error, latency=None):
+        self._stats.record_failure(error, latency)
+        self._logger.error(
+            f"[HireFire] Error while dispatching web metrics: {str(error)}"
+        )
+
+        state = self._dispatch_policy.state
+        self._dispatch_policy.record_failure(self._dispatch_interval)
+
+        if state != DispatchPolicy.OPEN and self.circuit_state() == DispatchPolicy.OPEN:
+            self._logger.error(
+                "[HireFire] Web metrics dispatch failed "
+                f"{self._dispatch_policy.failures} times in a row. "
+                "Pausing dispatch until the server recovers."
+            )
 
     def _start_dispatcher(self):
         while self.dispatcher_running():
             self._dispatch_buffer()
-            time.sleep(self._dispatch_interval)
+            self._wakeup.clear()
+            # Flagged before checking whether it's idle, so that a sample recorded in between
+            # still wakes the dispatcher up.
+            self._parked = True
+
+            if self._idle():
+                self._wakeup.wait()
+                self._wakeup.clear()
+
+            self._parked = False
+
+            if self._dispatcher_running:
+                self._wakeup.wait(
+                    self._dispatch_policy.interval(self._dispatch_interval)
+                )
+
+    def _idle(self):
+        # While no requests arrive there's nothing to dispatch, so the dispatcher parks until the
+        # first sample is recorded. The shared buffer's leader can't tell whether other processes
+        # recorded samples, so it never parks.
+        return (
+            self._dispatcher_running
+            and not self._samples
+            and not self._buffer
+            and not self._shared
+        )
+
+    def _wake_dispatcher(self):
+        dispatcher = self._dispatcher
+
+        if isinstance(dispatcher, asyncio.Task):
+            if self._async_wakeup and not dispatcher.get_loop().is_closed():
+                dispatcher.get_loop().call_soon_threadsafe(self._async_wakeup.set)
+        else:
+            self._wakeup.set()
+
+    async def _async_dispatch_buffer(self):
+        if not self._dispatch_policy.allow():
+            self._stats.skipped += 1
+            return
+
+        buffer = self._flush_buffer()
+
+        if buffer:
+            started = time.perf_counter_ns()
+            try:
+                if os.environ.get("HIREFIRE_VERBOSE"):
+                    self._logger.info(f"[HireFire] Dispatching web metrics: {buffer}")
+                await self._async_submit_buffer(buffer)
+                self._dispatch_policy.record_success()
+                self._stats.record_dispatch(time.perf_counter_ns() - started)
+            except asyncio.CancelledError:
+                self._repopulate_buffer(buffer)
+                raise
+            except Exception as e:
+                self._repopulate_buffer(buffer)
+                self._record_dispatch_failure(e, time.perf_counter_ns() - started)
+
+    async def _start_async_dispatcher(self):
+        self._async_wakeup = wakeup = asyncio.Event()
+
+        while self.dispatcher_running():
+            await self._async_dispatch_buffer()
+            wakeup.clear()
+            self._parked = True
+
+            if self._idle():
+                await wakeup.wait()
+                wakeup.clear()
+
+            self._parked = False
+
+            if self._dispatcher_running:
+                try:
+                    await asyncio.wait_for(
+                        wakeup.wait(),
+                        self._dispatch_policy.interval(self._dispatch_interval),
+                    )
+                except asyncio.TimeoutError:
+                    pass
 
     def _repopulate_buffer(self, buffer):
-        now = int(datetime.now().timestamp())
+        now = self.clock() // 1_000_000_000
         with self._mutex:
             for timestamp, request_queue_times in buffer.items():
                 if timestamp >= now - self._buffer_ttl:
-                    self._buffer.setdefault(timestamp, []).extend(request_queue_times)
+                    self._bucket(self._buffer, timestamp).extend(request_queue_times)
+                else:
+                    self._stats.dropped += len(request_queue_times)
 
-    def _submit_buffer(self, buffer):
+    def _bucket(self, buffer, timestamp):
+        bucket = buffer.get(timestamp)
+
+        if bucket is None:
+            bucket = buffer[timestamp] = self._bucket_factory()
+
+        return bucket
+
+    def _submit_buffer(self, buffer, timeout=None):
+        hirefire_dispatch_url, buffer_string, headers = self._build_request(buffer)
+        keep_alive = False
+
+        if timeout is None:
+            timeout = self._dispatch_timeout
+        elif timeout <= 0:
+            raise DispatchError("The dispatch deadline was exceeded.")
+        else:
+            timeout = min(timeout, self._dispatch_timeout)
+
+        try:
+            response = self._post(
+                hirefire_dispatch_url, buffer_string, headers, timeout
+            )
+
+            if response.status >= 400:
+                raise DispatchError(
+                    f"HTTP error occurred: {response.status} {response.reason}",
+                    status=response.status,
+                )
+
+            self._adjust_parameters(response)
+            keep_alive = not response.will_close
+            return response
+        except http.client.HTTPException as e:
+            raise DispatchError(f"HTTP error occurred: {str(e)}")
+        except socket.timeout:
+            raise DispatchError("The request to the server timed out.")
+        except Exception as e:
+            raise DispatchError(f"Error occurred during request: {str(e)}")
+        finally:
+            if not keep_alive:
+                self._close_connection()
+
+    def _build_request(self, buffer):
         hirefire_token = os.environ.get("HIREFIRE_TOKEN")
 
         if not hirefire_token:
@@ -101,7 +545,9 @@ class Web:
                 "the HireFire Web UI in the web dyno manager settings."
             )
 
-        buffer_string = json.dumps(buffer)
+        # Histograms are dispatched as lists of queue times, the only format the dispatch
+        # endpoint accepts.
+        buffer_string = json.dumps(buffer, default=Histogram.to_list)
 
         headers = {
             "Content-Type": "application/json",
@@ -114,29 +560,197 @@ class Web:
             "",
             os.environ.get("HIREFIRE_DISPATCH_URL", "logdrain.hirefire.io"),
         )
-        connection = http.client.HTTPSConnection(
-            hirefire_dispatch_url, timeout=self._dispatch_timeout
-        )
+
+        return hirefire_dispatch_url, buffer_string, headers
+
+    def _post(self, host, body, headers, timeout):
+        if self._connection is None or self._connection_host != host:
+            self._close_connection()
+            self._connection = http.client.HTTPSConnection(host, timeout=timeout)
+            self._connection_host = host
+
+        connection = self._connection
+        reused = connection.sock is not None
+        connection.timeout = timeout
+
+        if reused:
+            connection.sock.settimeout(timeout)
 
         try:
-            connection.request("POST", "/", buffer_string, headers)
+            connection.request("POST", "/", body, headers)
             response = connection.getresponse()
+        except (
+            ConnectionError,
+            http.client.BadStatusLine,
+            http.client.CannotSendRequest,
+        ):
+            if not reused:
+                raise
+            # The server closed the idle connection between dispatches. Retry once on a new one.
+            self._close_connection()
+            return self._post(host, body, headers, timeout)
+
+        # The response must be read in full before the connection can be reused.
+        response.read()
+        return response
+
+    def _close_connection(self):
+        connection = self._connection
+        self._connection = None
+        self._connection_host = None
+
+        if connection:
+            connection.close()
+
+    async def _async_submit_buffer(self, buffer):
+        hirefire_dispatch_url, buffer_string, headers = self._build_request(buffer)
+        keep_alive = False
+
+        try:
+            response = await asyncio.wait_for(
+                self._async_post(hirefire_dispatch_url, buffer_string, headers),
+                self._dispatch_timeout,
+            )
 
             if response.status >= 400:
                 raise DispatchError(
-                    f"HTTP error occurred: {response.status} {response.reason}"
+                    f"HTTP error occurred: {response.status} {response.reason}",
+                    status=response.status,
                 )
 
             self._adjust_parameters(response)
+            keep_alive = not response.will_close
             return response
         except http.client.HTTPException as e:
             raise DispatchError(f"HTTP error occurred: {str(e)}")
-        except socket.timeout:
+        except asyncio.TimeoutError:
             raise DispatchError("The request to the server timed out.")
         except Exception as e:
             raise DispatchError(f"Error occurred during request: {str(e)}")
         finally:
-            connection.close()
+            if not keep_alive:
+                self._close_async_connection()
+
+    async def _async_post(self, host, body, headers):
+        if self._async_connection is None or self._async_connection_host != host:
+            self._close_async_connection()
+            hostname, _, port = host.partition(":")
+            self._async_connection = await asyncio.open_connection(
+                hostname, int(port or 443), ssl=True
+            )
+            self._async_connection_host = host
+            reused = False
+        else:
+            reused = True
+
+        reader, writer = self._async_connection
+        payload = body.encode("utf-8")
+        lines = [
+            "POST / HTTP/1.1",
+            f"Host: {host}",
+            f"Content-Length: {len(payload)}",
+            *(f"{key}: {value}" for key, value in headers.items()),
+        ]
+
+        try:
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+            await writer.drain()
+            return await self._async_read_response(reader)
+        except (
+            ConnectionError,
+            asyncio.IncompleteReadError,
+            http.client.BadStatusLine,
+        ):
+            if not reused:
+                raise
+            # The server closed the idle connection between dispatches. Retry once on a new one.
+            self._close_async_connection()
+            return await self._async_post(host, body, headers)
+
+    async def _async_read_response(self, reader):
+        status_line = await reader.readline()
+
+        if not status_line:
+            raise http.client.RemoteDisconnected(
+                "Remote end closed connection without response"
+            )
+
+        try:
+            version, status, *reason = status_line.decode("latin-1").split(None, 2)
+            status = int(status)
+        except ValueError:
+            raise http.client.BadStatusLine(str(status_line))
+
+        if not version.startswith("HTTP/"):
+            raise http.client.BadStatusLine(str(status_line))
+
+        header_lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            header_lines.append(line)
+
+        headers = http.client.parse_headers(
+            io.BytesIO(b"".join(header_lines) + b"\r\n")
+        )
+        will_close = headers.get("Connection", "").lower() == "close"
+
+        if headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif "Content-Length" in headers:
+            await reader.readexactly(int(headers["Content-Length"]))
+        else:
+            await reader.read()
+            will_close = True
+
+        return _AsyncResponse(
+            status, reason[0].strip() if reason else "", headers, will_close
+        )
+
+    def _close_async_connection(self):
+        connection = self._async_connection
+        self._async_connection = None
+        self._async_connection_host = None
+
+        if connection:
+            connection[1].close()
+
+    def _register_shutdown_hooks(self):
+        # No SIGTERM handler is installed: it would stop the dispatcher from whichever bytecode
+        # the main thread was running, possibly while holding the mutex, and would replace the
+        # handling of servers that install theirs at C level. Servers that shut down gracefully
+        # exit normally, which runs the atexit hook.
+        if self._shutdown_hooks_registered:
+            return
+
+        self._shutdown_hooks_registered = True
+        atexit.register(self.stop_dispatcher)
+
+    def _reinitialize_after_fork(self):
+        # The child only inherits the thread that forked, so the dispatcher isn't running here,
+        # and the mutex may have been held by another thread. Samples in the buffer belong to the
+        # parent, and the parent's connection must not be shared. The dispatcher is started
+        # again by the child's first request.
+        self._mutex = threading.Lock()
+        self._buffer = {}
+        self._shards = [] if self._shards is not None else None
+        self._shard_local = threading.local()
+        self._samples = 0
+        self._stats = DispatchStats()
+        self._wakeup = threading.Event()
+        self._async_wakeup = None
+        self._parked = False
+        self._dispatcher_running = False
+        self._dispatcher = None
+        self._connection = None
+        self._connection_host = None
+        self._async_connection = None
+        self._async_connection_host = None
 
     def _adjust_parameters(self, response):
         if "HireFire-Resource-Dispatch-Interval" in response.headers:
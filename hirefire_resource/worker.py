@@ -1,4 +1,14 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import inspect
+import os
 import re
+import threading
+import time
+import weakref
+
+from hirefire_resource.cache import MemoryCache
 
 
 class InvalidDynoNameError(Exception):
@@ -9,17 +19,192 @@ class MissingDynoProcError(Exception):
     pass
 
 
+def _reinitialize_after_fork(reference):
+    worker = reference()
+
+    if worker:
+        worker._reinitialize_after_fork()
+
+
 class Worker:
     PROCESS_NAME_PATTERN = r"^[a-zA-Z][a-zA-Z0-9_-]{0,29}$"
+    LOCK_TIMEOUT = 60
 
-    def __init__(self, name, proc=None):
+    def __init__(
+        self,
+        name,
+        proc=None,
+        timeout=None,
+        ttl=None,
+        stale_ttl=0,
+        cache=None,
+        refresh_interval=None,
+    ):
         self._validate(name, proc)
         self.name = name
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache = cache or MemoryCache()
+        self.asynchronous = inspect.iscoroutinefunction(proc)
         self._proc = proc
+        self._pending = None
+        self._lock = threading.Lock()
+
+        if hasattr(os, "register_at_fork"):
+            reference = weakref.ref(self)
+            os.register_at_fork(
+                after_in_child=lambda: _reinitialize_after_fork(reference)
+            )
 
     def value(self):
         return self._proc()
 
+    def last(self):
+        """
+        Returns the last measured value and the time it was measured at, as a tuple, or None.
+        """
+        return self.cache.get(self.name)
+
+    @property
+    def last_value(self):
+        entry = self.last()
+        return entry[0] if entry else None
+
+    @property
+    def last_value_at(self):
+        entry = self.last()
+        return entry[1] if entry else None
+
+    def record(self, value):
+        self.cache.set(self.name, value, time.time())
+
+    async def async_last(self):
+        """
+        Returns the last measured value like `last`, without blocking the event loop.
+        """
+        return await self._async_cache(self.last)
+
+    async def async_record(self, value):
+        await self._async_cache(self.record, value)
+
+    def cached(self, entry, now=None):
+        """
+        Tells whether a cached entry may be served: "fresh" within `ttl` seconds of being
+        measured, "stale" within `stale_ttl` seconds after that, while it's being refreshed in
+        the background, and otherwise None.
+        """
+        if self.ttl is None or entry is None:
+            return None
+
+        age = (time.time() if now is None else now) - entry[1]
+
+        if age < self.ttl:
+            return "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return "stale"
+
+        return None
+
+    def submit(self, executor, revalidate=False):
+        """
+        Evaluates the proc on `executor` and records its value once it completes. While an
+        evaluation is in flight, e.g. one that missed its deadline, it's returned instead of
+        starting another one.
+
+        A revalidation only evaluates the proc if no other process is refreshing the worker's
+        cached value, and otherwise results in None.
+
+        The proc runs in a copy of the caller's context, so that it can use the application
+        context of frameworks that keep it in context variables, e.g. Flask's `current_app`.
+        """
+        with self._lock:
+            future = self._pending
+
+            if not isinstance(future, concurrent.futures.Future) or future.done():
+                future = self._pending = executor.submit(
+                    contextvars.copy_context().run,
+                    self._revalidate if revalidate else self._refresh,
+                )
+
+        return future
+
+    def schedule(self, revalidate=False):
+        """
+        Evaluates the coroutine proc in a task on the running event loop. Behaves like `submit`
+        otherwise.
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            task = self._pending
+
+            if (
+                not isinstance(task, asyncio.Task)
+                or task.done()
+                or task.get_loop() is not loop
+            ):
+                task = self._pending = loop.create_task(
+                    self._async_revalidate() if revalidate else self._async_refresh()
+                )
+                # Errors are served to requests awaiting the task, if any. Retrieve them so
+                # that background refreshes that fail aren't reported as unhandled.
+                task.add_done_callback(
+                    lambda task: task.cancelled() or task.exception()
+                )
+
+        return task
+
+    def _refresh(self):
+        value = self.value()
+
+        # A coroutine returned by a synchronous proc is awaited and recorded by the caller.
+        if not asyncio.iscoroutine(value):
+            self.record(value)
+
+        return value
+
+    def _revalidate(self):
+        if not self.cache.acquire(self.name, self.LOCK_TIMEOUT):
+            return None
+
+        try:
+            return self._refresh()
+        finally:
+            self.cache.release(self.name)
+
+    async def _async_refresh(self):
+        value = await self.value()
+        await self.async_record(value)
+        return value
+
+    async def _async_revalidate(self):
+        if not await self._async_cache(
+            self.cache.acquire, self.name, self.LOCK_TIMEOUT
+        ):
+            return None
+
+        try:
+            return await self._async_refresh()
+        finally:
+            await self._async_cache(self.cache.release, self.name)
+
+    async def _async_cache(self, method, *args):
+        if not self.cache.blocking:
+            return method(*args)
+
+        # A cache that does network I/O, such as a `RedisCache`, is called on the event loop's
+        # default executor rather than the one procs are evaluated on, so that it doesn't wait
+        # for slow procs.
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    def _reinitialize_after_fork(self):
+        # An evaluation in flight in the parent never completes in the child, as its thread
+        # wasn't inherited, and the lock may have been held by another thread.
+        self._pending = None
+        self._lock = threading.Lock()
+
     def _validate(self, name, proc):
         if not re.match(self.PROCESS_NAME_PATTERN, name or ""):
             raise InvalidDynoNameError(
@@ -13,6 +13,13 @@ def test():
     sh("pytest --cov=hirefire_resource --cov-report=html tests/")
 
 
+@task
+def benchmark():
+    sh("python -m benchmarks.web_contention")
+    sh("python -m benchmarks.request_matcher")
+    sh("python -m benchmarks.middleware")
+
+
 @task
 def check():
     sh("autoflake --remove-all-unused-imports -r --check .")
@@ -10,6 +10,7 @@ try:
     if not settings.configured:
         settings.configure(
             SECRET_KEY="dummy-secret-key",
+            INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes"],
             DATABASES={
                 "default": {
                     "ENGINE": "django.db.backends.sqlite3",
@@ -3,11 +3,15 @@ from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
 import pytest
+import redis
 from celery import Celery
 
 from hirefire_resource.errors import MissingQueueError
 from hirefire_resource.macro.celery import (
+    _RUN_AT_SCRIPT_SHA,
     _cache_worker_data,
+    _job_queue_size_rabbitmq,
+    _with_channel,
     async_job_queue_latency,
     async_job_queue_size,
     job_queue_latency,
@@ -106,6 +110,55 @@ def test_job_queue_latency_with_jobs_multi(celery_app):
     )
 
 
+def test_job_queue_latency_server_side(celery_app):
+    broker_url = celery_app.conf.broker_url
+
+    if not broker_url.startswith("redis://"):
+        pytest.skip("The run_at script only runs on Redis.")
+
+    enqueue_for_job_queue_latency_with_job(celery_app)
+
+    with celery_app.connection_or_acquire() as connection:
+        client = connection.default_channel.client
+        client.script_flush()
+
+    with patch.object(
+        redis.Redis, "evalsha", autospec=True, side_effect=redis.Redis.evalsha
+    ) as evalsha:
+        with patch.object(
+            redis.Redis, "eval", autospec=True, side_effect=redis.Redis.eval
+        ) as eval:
+            # The script isn't cached by the server yet, so EVALSHA fails with NOSCRIPT and
+            # the script is sent with EVAL.
+            assert math.isclose(
+                job_queue_latency(
+                    "celery",
+                    "mailer",
+                    "missing",
+                    broker_url=broker_url,
+                    server_side=True,
+                ),
+                8,
+                abs_tol=1,
+            )
+            assert evalsha.call_count == 1
+            assert eval.call_count == 1
+            assert client.script_exists(_RUN_AT_SCRIPT_SHA) == [True]
+
+            # EVAL cached the script, so EVALSHA runs it from now on.
+            assert math.isclose(
+                job_queue_latency("celery", broker_url=broker_url, server_side=True),
+                4,
+                abs_tol=1,
+            )
+            assert evalsha.call_count == 2
+            assert eval.call_count == 1
+
+    assert job_queue_latency("missing", broker_url=broker_url, server_side=True) == 0
+    # Verify that peeking doesn't discard the message
+    assert job_queue_size("celery", "mailer", broker_url=broker_url) == 10
+
+
 @pytest.mark.asyncio
 async def test_async_job_queue_latency_missing_queue():
     with pytest.raises(MissingQueueError):
@@ -183,6 +236,47 @@ def test_job_queue_size_with_jobs(celery_app):
     )
 
 
+def test_job_queue_size_with_missing_queues(celery_app):
+    for _ in range(5):
+        celery_app.send_task("test_task", queue="celery")
+        celery_app.send_task("test_task", queue="mailer")
+
+    assert (
+        job_queue_size(
+            "missing",
+            "celery",
+            "other",
+            "mailer",
+            broker_url=celery_app.conf.broker_url,
+        )
+        == 10
+    )
+
+
+def test_job_queue_size_rabbitmq_channel_survives_missing_queues(celery_app):
+    broker_url = celery_app.conf.broker_url
+
+    if not broker_url.startswith("amqp://"):
+        pytest.skip("Declarations are only pipelined on RabbitMQ.")
+
+    for _ in range(5):
+        celery_app.send_task("test_task", queue="celery")
+        celery_app.send_task("test_task", queue="mailer")
+
+    def measure(app, channel):
+        size = _job_queue_size_rabbitmq(
+            channel, ["celery", "missing", "mailer", "other"]
+        )
+        return (
+            size,
+            channel.is_open,
+            channel.queue_declare(queue="mailer", passive=True).message_count,
+        )
+
+    assert _with_channel(broker_url, measure) == (10, True, 5)
+    assert job_queue_size("celery", "mailer", broker_url=broker_url) == 10
+
+
 def test_job_queue_size_connection_reset(celery_app):
     with patch(
         "hirefire_resource.macro.celery._job_queue_size_worker"
@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import pytest
+from celery import current_app
+
+from hirefire_resource.macro import celery
+from hirefire_resource.macro.celery import _broker, _broker_url, _with_channel
+
+broker_url = "memory://"
+
+
+def test_broker_url(monkeypatch):
+    for name in ["AMQP_URL", "RABBITMQ_URL", "REDIS_URL"]:
+        monkeypatch.delenv(name, raising=False)
+    assert _broker_url("redis://localhost:6379/1") == "redis://localhost:6379/1"
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/2")
+    assert _broker_url() == "redis://localhost:6379/2"
+    monkeypatch.setenv("RABBITMQ_URL", "amqp://localhost:5672")
+    assert _broker_url() == "amqp://localhost:5672"
+
+
+def test_broker_is_reused_per_broker_url():
+    app, pool = _broker(broker_url)
+    assert _broker(broker_url) == (app, pool)
+    assert _broker("memory://localhost/other")[0] is not app
+    assert current_app is not app
+
+
+def test_brokers_are_reset_after_fork():
+    broker = _broker(broker_url)
+    with patch("os.getpid", return_value=celery._brokers_pid + 1):
+        assert _broker(broker_url) is not broker
+
+
+def test_with_channel_reuses_connection():
+    connections = []
+
+    def fn(app, channel):
+        connections.append(channel.connection)
+        return 1
+
+    assert _with_channel(broker_url, fn) == 1
+    assert _with_channel(broker_url, fn) == 1
+    assert connections[0] is connections[1]
+
+
+def test_with_channel_retries_once_on_reused_connection():
+    _with_channel(broker_url, lambda app, channel: None)
+    calls = []
+
+    def fn(app, channel):
+        calls.append(channel.connection.client.connected)
+        if len(calls) == 1:
+            raise ConnectionResetError
+        return 1
+
+    assert _with_channel(broker_url, fn) == 1
+    assert len(calls) == 2
+
+
+def test_with_channel_raises_on_repeated_failure():
+    _with_channel(broker_url, lambda app, channel: None)
+
+    def fn(app, channel):
+        raise ConnectionResetError
+
+    with pytest.raises(ConnectionResetError):
+        _with_channel(broker_url, fn)
+
+
+def test_with_channel_does_not_retry_other_errors():
+    calls = []
+
+    def fn(app, channel):
+        calls.append(None)
+        raise KeyError("queue")
+
+    with pytest.raises(KeyError):
+        _with_channel(broker_url, fn)
+    assert len(calls) == 1
+
+
+def test_with_channel_evicts_pool_with_closed_connection():
+    broker = _broker(broker_url)
+
+    # kombu closes a pooled connection when an error leaves its context, and then keeps it in
+    # the pool.
+    with pytest.raises(KeyError):
+        with broker[1].acquire():
+            raise KeyError
+
+    assert _with_channel(broker_url, lambda app, channel: app) is not broker[0]
+    assert _broker(broker_url) is not broker
@@ -0,0 +1,201 @@
+import json
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from redis.exceptions import NoScriptError
+
+from hirefire_resource.macro.celery import (
+    _RUN_AT_SCRIPT,
+    _RUN_AT_SCRIPT_SHA,
+    job_queue_latency,
+    job_queue_size,
+)
+
+
+class CountingRedis:
+    """
+    Stands in for the Redis client of a Celery Redis channel, and counts round trips.
+    """
+
+    def __init__(self, lists):
+        self.lists = lists
+        self.round_trips = 0
+        self.transferred = 0
+        self.scripts = set()
+
+    def lindex(self, key, index):
+        self.round_trips += 1
+        return self._lindex(key, index)
+
+    def llen(self, key):
+        self.round_trips += 1
+        return self._llen(key)
+
+    def evalsha(self, sha, numkeys, *keys):
+        self.round_trips += 1
+        if sha not in self.scripts:
+            raise NoScriptError("No matching script.")
+        return self._run_at_script(keys)
+
+    def eval(self, script, numkeys, *keys):
+        self.round_trips += 1
+        assert script == _RUN_AT_SCRIPT
+        self.scripts.add(_RUN_AT_SCRIPT_SHA)
+        return self._run_at_script(keys)
+
+    def _run_at_script(self, keys):
+        # Emulates the Lua script's pattern match on the oldest job of every queue.
+        run_ats = []
+        for key in keys:
+            job = self._lindex(key, -1)
+            match = job and re.search(rb'"run_at"\s*:\s*"([^"]*)"', job)
+            run_ats.append(match.group(1) if match else None)
+        self.transferred += sum(len(run_at or b"") for run_at in run_ats)
+        return run_ats
+
+    def pipeline(self, transaction=True):
+        return CountingPipeline(self)
+
+    def _lindex(self, key, index):
+        items = self.lists.get(key, [])
+        return items[index] if -len(items) <= index < len(items) else None
+
+    def _llen(self, key):
+        return len(self.lists.get(key, []))
+
+
+class CountingPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.commands = []
+
+    def lindex(self, key, index):
+        def command():
+            job = self.client._lindex(key, index)
+            self.client.transferred += len(job or b"")
+            return job
+
+        self.commands.append(command)
+
+    def llen(self, key):
+        self.commands.append(lambda: self.client._llen(key))
+
+    def execute(self):
+        self.client.round_trips += 1
+        results = [command() for command in self.commands]
+        self.commands = []
+        return results
+
+
+class Channel:
+    def __init__(self, client):
+        self.client = client
+
+    def _size(self, queue):
+        return self.client._llen(queue)
+
+
+def job(seconds_ago, body=""):
+    run_at = datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)
+    return json.dumps(
+        {
+            "body": body,
+            "headers": {
+                "argsrepr": '({"run_at": "2000-01-01T00:00:00+00:00"},)',
+                "run_at": run_at.isoformat(),
+            },
+        }
+    ).encode("utf-8")
+
+
+def queues(count):
+    # Jobs are pushed onto the head of the list, so the oldest job is the last one.
+    return {
+        f"queue{index}": [job(index), job(index * 2)] for index in range(1, count + 1)
+    }
+
+
+def with_channel(client):
+    def _with_channel(broker_url, fn):
+        return fn(None, Channel(client))
+
+    return patch("hirefire_resource.macro.celery._with_channel", _with_channel)
+
+
+def test_job_queue_latency_in_one_round_trip():
+    client = CountingRedis(queues(15))
+
+    with with_channel(client):
+        latency = job_queue_latency(*client.lists, "empty", broker_url="redis://")
+
+    assert math.isclose(latency, 30, abs_tol=1)
+    assert client.round_trips == 1
+
+
+def test_job_queue_latency_without_jobs():
+    client = CountingRedis({})
+
+    with with_channel(client):
+        assert job_queue_latency("celery", broker_url="redis://") == 0
+
+    assert client.round_trips == 1
+
+
+def test_job_queue_size_in_one_round_trip():
+    client = CountingRedis(queues(15))
+
+    with with_channel(client), patch(
+        "hirefire_resource.macro.celery._job_queue_size_worker", return_value=3
+    ):
+        size = job_queue_size(*client.lists, "empty", broker_url="redis://")
+
+    assert size == 33
+    assert client.round_trips == 1
+
+
+def test_job_queue_latency_server_side():
+    client = CountingRedis(queues(15))
+    client.lists["large"] = [job(1, body="A" * 1_000_000)]
+
+    with with_channel(client):
+        latency = job_queue_latency(
+            *client.lists, "empty", broker_url="redis://", server_side=True
+        )
+
+    assert math.isclose(latency, 30, abs_tol=1)
+    assert client.round_trips == 2  # EVALSHA, then EVAL to load the script.
+    assert client.transferred < 16 * 40
+
+    with with_channel(client):
+        job_queue_latency(*client.lists, broker_url="redis://", server_side=True)
+
+    assert client.round_trips == 3
+
+
+def test_job_queue_latency_server_side_without_jobs():
+    client = CountingRedis({"celery": [b'{"headers": {}}']})
+
+    with with_channel(client):
+        assert (
+            job_queue_latency(
+                "celery", "empty", broker_url="redis://", server_side=True
+            )
+            == 0
+        )
+
+
+def test_job_queue_latency_transfers_whole_jobs():
+    client = CountingRedis({"large": [job(1, body="A" * 1_000_000)]})
+
+    with with_channel(client):
+        job_queue_latency("large", broker_url="redis://")
+
+    assert client.transferred > 1_000_000
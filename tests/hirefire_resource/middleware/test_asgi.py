@@ -0,0 +1,367 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from freezegun import freeze_time
+
+from hirefire_resource import HireFire
+from hirefire_resource.cache import RedisCache
+from hirefire_resource.configuration import Configuration
+from hirefire_resource.middleware.asgi import collect_workers_data, extract_request_info
+
+
+def scope(*headers):
+    return {"type": "http", "path": "/", "headers": list(headers)}
+
+
+def test_extract_request_info():
+    request_info = extract_request_info(
+        scope(
+            (b"host", b"localhost"),
+            (b"x-request-start", b"1634367001000"),
+            (b"hirefire-token", b"token"),
+        )
+    )
+    assert request_info.path == "/"
+    assert request_info.request_start_time == 1634367001000
+    assert request_info.token == "token"
+
+
+def test_extract_request_info_without_headers():
+    request_info = extract_request_info(scope((b"host", b"localhost")))
+    assert request_info.request_start_time is None
+    assert request_info.token is None
+
+
+def test_extract_request_info_with_uppercase_header_names():
+    request_info = extract_request_info(
+        scope((b"X-Request-Start", b"1634367001000"), (b"HireFire-Token", b"token"))
+    )
+    assert request_info.request_start_time == 1634367001000
+    assert request_info.token == "token"
+
+
+def test_extract_request_info_with_invalid_request_start():
+    request_info = extract_request_info(scope((b"x-request-start", b"invalid")))
+    assert request_info.request_start_time is None
+
+
+def test_extract_request_info_uses_first_occurrence():
+    request_info = extract_request_info(
+        scope(
+            (b"hirefire-token", b"first"),
+            (b"hirefire-token", b"second"),
+            (b"x-request-start", b"1"),
+        )
+    )
+    assert request_info.token == "first"
+    assert request_info.request_start_time == 1
+
+
+def test_extract_request_info_stops_once_both_headers_are_found():
+    class Headers(list):
+        def __iter__(self):
+            for header in super().__iter__():
+                self.visited += 1
+                yield header
+
+    headers = Headers(
+        [
+            (b"hirefire-token", b"token"),
+            (b"x-request-start", b"1"),
+            (b"host", b"localhost"),
+        ]
+    )
+    headers.visited = 0
+    extract_request_info({"path": "/", "headers": headers})
+    assert headers.visited == 2
+
+
+@pytest.fixture
+def configuration():
+    HireFire.configuration = Configuration()
+    yield HireFire.configuration
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_concurrently(configuration):
+    started = asyncio.Event()
+    barrier = threading.Barrier(2, timeout=2)
+
+    async def measure_async():
+        started.set()
+        await asyncio.sleep(0)
+        return 1
+
+    def measure(value):
+        def proc():
+            barrier.wait()
+            return value
+
+        return proc
+
+    configuration.worker_concurrency = 8
+    configuration.dyno("async_worker", measure_async)
+    configuration.dyno("worker", measure(2))
+    configuration.dyno("mailer", measure(3))
+
+    assert await collect_workers_data() == [
+        {"name": "async_worker", "value": 1},
+        {"name": "worker", "value": 2},
+        {"name": "mailer", "value": 3},
+    ]
+    assert started.is_set()
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_runs_sync_procs_off_the_event_loop(configuration):
+    loop_thread = threading.current_thread()
+    configuration.worker_concurrency = 8
+    configuration.dyno("worker", lambda: threading.current_thread() is loop_thread)
+
+    assert await collect_workers_data() == [{"name": "worker", "value": False}]
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_serially(configuration):
+    loop_thread = threading.current_thread()
+
+    async def measure_async():
+        return 1
+
+    configuration.worker_concurrency = 1
+    configuration.dyno("async_worker", measure_async)
+    configuration.dyno("worker", lambda: threading.current_thread() is loop_thread)
+
+    assert await collect_workers_data() == [
+        {"name": "async_worker", "value": 1},
+        {"name": "worker", "value": True},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_awaits_returned_coroutines(configuration):
+    async def measure_async():
+        return 1
+
+    configuration.dyno("worker", lambda: measure_async())
+
+    assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_falls_back_to_last_value(configuration, caplog):
+    values = iter([2, ValueError("broker unavailable")])
+
+    async def measure():
+        value = next(values)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    configuration.dyno("worker", lambda: 1)
+    configuration.dyno("mailer", measure)
+
+    assert (await collect_workers_data())[1] == {"name": "mailer", "value": 2}
+    assert await collect_workers_data() == [
+        {"name": "worker", "value": 1},
+        {"name": "mailer", "value": 2, "stale": True},
+    ]
+    assert "Unable to measure mailer: broker unavailable" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_with_worker_deadline(configuration, caplog):
+    release = asyncio.Event()
+    values = iter([2, 3, 4])
+
+    async def measure():
+        value = next(values)
+        if value == 3:
+            await release.wait()
+        return value
+
+    configuration.dyno("worker", lambda: 1)
+    configuration.dyno("mailer", measure, timeout=0.05)
+
+    assert (await collect_workers_data())[1] == {"name": "mailer", "value": 2}
+    assert await collect_workers_data() == [
+        {"name": "worker", "value": 1},
+        {"name": "mailer", "value": 2, "stale": True},
+    ]
+    assert "it didn't finish before its deadline" in caplog.text
+
+    # The evaluation that missed its deadline completes in the background.
+    release.set()
+    mailer = configuration.workers[1]
+    assert await mailer._pending == 3
+    assert mailer.last_value == 3
+    assert (await collect_workers_data())[1] == {"name": "mailer", "value": 4}
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_with_info_timeout(configuration):
+    release = threading.Event()
+    configuration.info_timeout = 0.05
+    configuration.dyno("worker", lambda: release.wait(2) and 1)
+
+    assert await collect_workers_data() == []
+    release.set()
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_with_hung_worker_by_default(configuration):
+    release = threading.Event()
+    configuration.dyno("worker", lambda: release.wait(2) and 1, timeout=0.05)
+    configuration.dyno("mailer", lambda: 2, timeout=0.05)
+
+    assert await collect_workers_data() == [{"name": "mailer", "value": 2}]
+    assert await collect_workers_data() == [{"name": "mailer", "value": 2}]
+    release.set()
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_serves_stale_values_while_revalidating(
+    configuration,
+):
+    calls = []
+    release = asyncio.Event()
+
+    async def measure():
+        calls.append(None)
+        if len(calls) > 1:
+            await release.wait()
+        return len(calls)
+
+    configuration.dyno("worker", measure, ttl=10, stale_ttl=20)
+    worker = configuration.workers[0]
+
+    with freeze_time("2000-01-01 00:00:00") as frozen_time:
+        assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+        frozen_time.tick(5)
+        assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+        assert len(calls) == 1
+
+        frozen_time.tick(10)
+        assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+        assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+        release.set()
+        assert await worker._pending == 2
+        assert len(calls) == 2
+        assert await collect_workers_data() == [{"name": "worker", "value": 2}]
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_shares_one_computation_between_requests(
+    configuration,
+):
+    calls = []
+
+    async def measure():
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return 1
+
+    configuration.worker_concurrency = 8
+    configuration.dyno("worker", measure)
+
+    results = await asyncio.gather(*[collect_workers_data() for _ in range(4)])
+    assert results == [[{"name": "worker", "value": 1}]] * 4
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("asynchronous", [True, False])
+async def test_collect_workers_data_shares_one_computation_for_cached_worker(
+    configuration, asynchronous
+):
+    calls = []
+
+    def measure():
+        calls.append(None)
+        time.sleep(0.05)
+        return 1
+
+    async def measure_async():
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return 1
+
+    configuration.dyno("worker", measure_async if asynchronous else measure, ttl=10)
+
+    results = await asyncio.gather(*[collect_workers_data() for _ in range(5)])
+    assert results == [[{"name": "worker", "value": 1}]] * 5
+    assert len(calls) == 1
+
+
+class ThreadRecordingRedis:
+    def __init__(self):
+        self.data = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread())
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        self.threads.append(threading.current_thread())
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode()
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        self.threads.append(threading.current_thread())
+        return int(self.data.pop(key, None) is not None)
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_calls_redis_cache_off_the_event_loop(
+    configuration,
+):
+    async def measure():
+        return 1
+
+    client = ThreadRecordingRedis()
+    configuration.dyno("worker", measure, ttl=0, stale_ttl=60, cache=RedisCache(client))
+    worker = configuration.workers[0]
+
+    assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+    # The value is stale right away, so it's revalidated under the lock.
+    assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+    assert await worker._pending == 1
+
+    assert "hirefire-resource:worker:lock" not in client.data
+    assert len(client.threads) == 6
+    assert threading.current_thread() not in client.threads
+
+
+@pytest.mark.asyncio
+async def test_collect_workers_data_from_refresher_snapshot(configuration):
+    calls = []
+    release = asyncio.Event()
+
+    async def measure():
+        calls.append(None)
+        if len(calls) > 1:
+            await release.wait()
+        return len(calls)
+
+    configuration.refresh_interval = 0.01
+    configuration.dyno("worker", measure)
+
+    try:
+        assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+        assert isinstance(configuration.refresher._runner, asyncio.Task)
+
+        while len(calls) < 2:
+            await asyncio.sleep(0.005)
+        assert await collect_workers_data() == [{"name": "worker", "value": 1}]
+        release.set()
+
+        while configuration.refresher.get(configuration.workers[0])[0] < 2:
+            await asyncio.sleep(0.005)
+        assert await collect_workers_data() == [{"name": "worker", "value": 2}]
+    finally:
+        configuration.refresher.stop()
@@ -107,3 +107,16 @@ async def test_intercept_and_process_worker_configuration_with_token(
     assert response.headers["content-type"] == "application/json"
     assert response.headers["cache-control"] == "must-revalidate, private, max-age=0"
     assert response.headers["hirefire-resource"] == f"Python-{VERSION}"
+
+
+@pytest.mark.asyncio
+async def test_lifespan_starts_and_stops_async_dispatcher(set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web", async_dispatcher=True)
+    web = HireFire.configuration.web
+    with patch.object(web, "start_async_dispatcher") as mock_start:
+        with patch.object(web, "stop_async_dispatcher") as mock_stop:
+            async with app.test_app():
+                mock_start.assert_awaited_once()
+                mock_stop.assert_not_awaited()
+            mock_stop.assert_awaited_once()
@@ -0,0 +1,171 @@
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from freezegun import freeze_time
+
+from hirefire_resource import HireFire
+from hirefire_resource.configuration import Configuration
+from hirefire_resource.middleware.asgi.raw import HireFireMiddleware
+from hirefire_resource.version import VERSION
+from tests.helpers import HIREFIRE_TOKEN, set_HIREFIRE_TOKEN  # noqa
+
+
+async def default_app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            await send({"type": message["type"] + ".complete"})
+            if message["type"] == "lifespan.shutdown":
+                return
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b"DEFAULT"})
+
+
+class Client:
+    def __init__(self, app):
+        self.app = app
+
+    async def get(self, path, headers=None):
+        scope = {
+            "type": "http",
+            "path": path,
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app(scope, receive, send)
+
+        start, body = messages
+        return {
+            "status": start["status"],
+            "headers": dict(start["headers"]),
+            "body": body["body"],
+        }
+
+    async def lifespan(self):
+        messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await self.app({"type": "lifespan"}, receive, send)
+        return sent
+
+
+@pytest.fixture(autouse=True)
+def setup():
+    HireFire.configuration = Configuration()
+    yield
+
+
+@pytest.fixture
+def client():
+    return Client(HireFireMiddleware(default_app))
+
+
+async def measure_queue_metric():
+    return 1.23
+
+
+@pytest.mark.asyncio
+async def test_pass_through_without_HIREFIRE_TOKEN(client):
+    with HireFire.configure() as config:
+        config.dyno("web")
+        config.dyno("worker", measure_queue_metric)
+    with patch.object(HireFire.configuration.web, "start_dispatcher") as mock_start:
+        response = await client.get("/", headers={"X-Request-Start": "1"})
+        assert response["status"] == 200
+        assert response["body"] == b"DEFAULT"
+        mock_start.assert_not_called()
+
+
+@pytest.mark.asyncio
+@freeze_time("2000-01-01 00:00:00")
+async def test_pass_through_without_configuration(client, set_HIREFIRE_TOKEN):
+    response = await client.get("/", headers={"X-Request-Start": "1"})
+    assert response["status"] == 200
+    assert response["body"] == b"DEFAULT"
+
+
+@pytest.mark.asyncio
+@freeze_time("2000-01-01 00:00:00")
+async def test_pass_through_and_process_web_configuration(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web")
+    with patch.object(HireFire.configuration.web, "start_dispatcher") as mock_start:
+        response = await client.get(
+            "/", headers={"X-Request-Start": str(int(time.time() * 1000 - 5))}
+        )
+        assert response["body"] == b"DEFAULT"
+        assert HireFire.configuration.web._buffer == {946684800: [5]}
+        mock_start.assert_called()
+
+
+@pytest.mark.asyncio
+@freeze_time("2000-01-01 00:00:00")
+async def test_intercept_and_process_worker_configuration(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("worker", measure_queue_metric)
+    response = await client.get(
+        f"/hirefire/{HIREFIRE_TOKEN}/info", headers={"X-Request-Start": "1"}
+    )
+    assert response["status"] == 200
+    assert json.loads(response["body"]) == [{"name": "worker", "value": 1.23}]
+    assert response["headers"] == {
+        b"content-type": b"application/json",
+        b"cache-control": b"must-revalidate, private, max-age=0",
+        b"hirefire-resource": f"Python-{VERSION}".encode(),
+        b"content-length": str(len(response["body"])).encode(),
+    }
+
+
+@pytest.mark.asyncio
+@freeze_time("2000-01-01 00:00:00")
+async def test_intercept_and_process_worker_configuration_with_token(
+    client, set_HIREFIRE_TOKEN
+):
+    with HireFire.configure() as config:
+        config.dyno("worker", measure_queue_metric)
+    response = await client.get(
+        "/hirefire", headers={"X-Request-Start": "1", "HireFire-Token": HIREFIRE_TOKEN}
+    )
+    assert response["status"] == 200
+    assert json.loads(response["body"]) == [{"name": "worker", "value": 1.23}]
+    assert response["headers"][b"content-type"] == b"application/json"
+
+
+@pytest.mark.asyncio
+async def test_lifespan_starts_and_stops_async_dispatcher(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web", async_dispatcher=True)
+    web = HireFire.configuration.web
+    with patch.object(web, "start_async_dispatcher") as mock_start:
+        with patch.object(web, "stop_async_dispatcher") as mock_stop:
+            assert await client.lifespan() == [
+                "lifespan.startup.complete",
+                "lifespan.shutdown.complete",
+            ]
+            mock_start.assert_awaited_once()
+            mock_stop.assert_awaited_once()
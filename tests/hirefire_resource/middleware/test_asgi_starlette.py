@@ -7,6 +7,7 @@ from freezegun import freeze_time
 from starlette.applications import Starlette
 from starlette.responses import PlainTextResponse
 from starlette.routing import Route
+from starlette.testclient import TestClient
 
 from hirefire_resource import HireFire
 from hirefire_resource.configuration import Configuration
@@ -108,3 +109,15 @@ async def test_intercept_and_process_worker_configuration_with_token(
     assert response.headers["Content-Type"] == "application/json"
     assert response.headers["cache-control"] == "must-revalidate, private, max-age=0"
     assert response.headers["hirefire-resource"] == f"Python-{VERSION}"
+
+
+def test_lifespan_starts_and_stops_async_dispatcher(set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web", async_dispatcher=True)
+    web = HireFire.configuration.web
+    with patch.object(web, "start_async_dispatcher") as mock_start:
+        with patch.object(web, "stop_async_dispatcher") as mock_stop:
+            with TestClient(app):
+                mock_start.assert_awaited_once()
+                mock_stop.assert_not_awaited()
+            mock_stop.assert_awaited_once()
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from hirefire_resource import HireFire
+from hirefire_resource.configuration import Configuration
+from hirefire_resource.middleware import (
+    RequestInfo,
+    refresh_request_matcher,
+    request_matcher,
+)
+from tests.helpers import HIREFIRE_TOKEN, set_HIREFIRE_TOKEN  # noqa
+
+
+@pytest.fixture(autouse=True)
+def setup():
+    HireFire.configuration = Configuration()
+    yield
+    refresh_request_matcher()
+
+
+def test_matches_hirefire_path(set_HIREFIRE_TOKEN):
+    matcher = request_matcher()
+    assert matcher.matches(RequestInfo("/hirefire", token=HIREFIRE_TOKEN))
+    assert not matcher.matches(RequestInfo("/hirefire", token="invalid"))
+    assert not matcher.matches(RequestInfo("/hirefire"))
+
+
+def test_matches_info_path(set_HIREFIRE_TOKEN):
+    matcher = request_matcher()
+    assert matcher.matches(RequestInfo(f"/hirefire/{HIREFIRE_TOKEN}/info"))
+    assert not matcher.matches(RequestInfo("/hirefire/invalid/info"))
+    assert not matcher.matches(RequestInfo("/any"))
+
+
+def test_matches_nothing_without_HIREFIRE_TOKEN():
+    matcher = request_matcher()
+    assert not matcher.matches(RequestInfo("/hirefire", token=None))
+    assert not matcher.matches(RequestInfo("/hirefire/None/info"))
+
+
+def test_matches_nothing_with_empty_HIREFIRE_TOKEN(monkeypatch):
+    monkeypatch.setenv("HIREFIRE_TOKEN", "")
+    matcher = request_matcher()
+    assert matcher.token is None
+    assert not matcher.matches(RequestInfo("/hirefire", token=""))
+    assert not matcher.matches(RequestInfo("/hirefire//info"))
+
+
+def test_web_requires_HIREFIRE_TOKEN():
+    with HireFire.configure() as config:
+        config.dyno("web")
+    assert request_matcher().web is None
+
+
+def test_web(set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web")
+    assert request_matcher().web is HireFire.configuration.web
+
+
+def test_reuses_matcher(set_HIREFIRE_TOKEN):
+    assert request_matcher() is request_matcher()
+
+
+def test_rebuilds_matcher_when_configuration_changes(set_HIREFIRE_TOKEN):
+    matcher = request_matcher()
+    with HireFire.configure() as config:
+        config.dyno("web")
+    assert request_matcher() is not matcher
+    assert request_matcher().web is HireFire.configuration.web
+
+    matcher = request_matcher()
+    HireFire.configuration = Configuration()
+    assert request_matcher() is not matcher
+    assert request_matcher().web is None
+
+
+def test_refresh_request_matcher(set_HIREFIRE_TOKEN):
+    matcher = request_matcher()
+    os.environ["HIREFIRE_TOKEN"] = "new-token"
+    assert request_matcher() is matcher
+    refresh_request_matcher()
+    assert request_matcher().token == "new-token"
+    assert request_matcher().matches(RequestInfo("/hirefire/new-token/info"))
+
+
+def test_process_request_queue_time_reads_clock_once(set_HIREFIRE_TOKEN):
+    reads = []
+
+    def clock():
+        reads.append(None)
+        return 1634367001_500_000_000
+
+    with HireFire.configure() as config:
+        config.dyno("web", clock=clock)
+
+    web = HireFire.configuration.web
+    web._dispatcher_running = True
+    request_matcher().process_request_queue_time(
+        RequestInfo("/", request_start_time="1634367001400")
+    )
+    assert web._flush_buffer() == {1634367001: [100]}
+    assert len(reads) == 1
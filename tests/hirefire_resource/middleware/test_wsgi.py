@@ -0,0 +1,454 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from hirefire_resource import HireFire
+from hirefire_resource.cache import MemoryCache
+from hirefire_resource.configuration import Configuration
+from hirefire_resource.middleware import worker_executor
+from hirefire_resource.middleware.wsgi import collect_workers_data, start_refresher
+
+
+@pytest.fixture(autouse=True)
+def setup():
+    HireFire.configuration = Configuration()
+    yield
+
+
+class Clock:
+    """
+    Stands in for `time.time`, as freezegun reports the real time to the worker executor's
+    threads.
+    """
+
+    def __init__(self, now=946684800.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with patch("time.time", clock):
+        yield clock
+
+
+def test_collect_workers_data_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def measure(value):
+        def proc():
+            barrier.wait()
+            return value
+
+        return proc
+
+    with HireFire.configure() as config:
+        config.worker_concurrency = 8
+        for index in range(3):
+            config.dyno(f"worker{index}", measure(index))
+
+    assert collect_workers_data() == [
+        {"name": "worker0", "value": 0},
+        {"name": "worker1", "value": 1},
+        {"name": "worker2", "value": 2},
+    ]
+
+
+def test_collect_workers_data_serially_by_default():
+    threads = []
+
+    def measure():
+        threads.append(threading.current_thread())
+        return 1
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure)
+        config.dyno("mailer", measure)
+
+    assert collect_workers_data() == [
+        {"name": "worker", "value": 1},
+        {"name": "mailer", "value": 1},
+    ]
+    assert threads == [threading.current_thread()] * 2
+
+
+def test_collect_workers_data_leaves_out_failing_worker_without_value(caplog):
+    def fail():
+        raise ValueError("broker unavailable")
+
+    with HireFire.configure() as config:
+        config.dyno("worker", lambda: 1)
+        config.dyno("mailer", fail)
+
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    assert "Unable to measure mailer: broker unavailable" in caplog.text
+    assert "left out" in caplog.text
+
+
+@pytest.mark.parametrize("worker_concurrency", [1, 8])
+def test_collect_workers_data_falls_back_to_last_value(caplog, worker_concurrency):
+    values = iter([2, ValueError("broker unavailable")])
+
+    def measure():
+        value = next(values)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    with HireFire.configure() as config:
+        config.worker_concurrency = worker_concurrency
+        config.dyno("worker", lambda: 1)
+        config.dyno("mailer", measure)
+
+    assert collect_workers_data()[1] == {"name": "mailer", "value": 2}
+    assert collect_workers_data() == [
+        {"name": "worker", "value": 1},
+        {"name": "mailer", "value": 2, "stale": True},
+    ]
+    assert "Falling back to its last known value." in caplog.text
+
+
+def test_collect_workers_data_with_worker_deadline(caplog):
+    release = threading.Event()
+    values = iter([2, 3, 4])
+
+    def measure():
+        value = next(values)
+        if value == 3:
+            release.wait(2)
+        return value
+
+    with HireFire.configure() as config:
+        config.dyno("worker", lambda: 1)
+        config.dyno("mailer", measure, timeout=0.05)
+
+    assert collect_workers_data()[1] == {"name": "mailer", "value": 2}
+    assert collect_workers_data() == [
+        {"name": "worker", "value": 1},
+        {"name": "mailer", "value": 2, "stale": True},
+    ]
+    assert "Unable to measure mailer: it didn't finish before its deadline" in (
+        caplog.text
+    )
+
+    # The evaluation that missed its deadline completes in the background.
+    release.set()
+    mailer = HireFire.configuration.workers[1]
+    assert mailer._pending.result(2) == 3
+    assert mailer.last_value == 3
+    assert collect_workers_data()[1] == {"name": "mailer", "value": 4}
+
+
+def test_collect_workers_data_with_info_timeout():
+    release = threading.Event()
+
+    with HireFire.configure() as config:
+        config.info_timeout = 0.05
+        config.dyno("worker", lambda: release.wait(2) and 1)
+
+    started = time.monotonic()
+    assert collect_workers_data() == []
+    assert time.monotonic() - started < 1
+    release.set()
+
+
+def test_collect_workers_data_with_hung_worker_by_default():
+    release = threading.Event()
+
+    with HireFire.configure() as config:
+        config.dyno("worker", lambda: release.wait(2) and 1, timeout=0.05)
+        config.dyno("mailer", lambda: 2, timeout=0.05)
+
+    assert collect_workers_data() == [{"name": "mailer", "value": 2}]
+    # The hung evaluation keeps its thread, and later requests still measure the other worker.
+    assert collect_workers_data() == [{"name": "mailer", "value": 2}]
+    release.set()
+
+
+def test_collect_workers_data_shares_evaluation_in_flight():
+    release = threading.Event()
+    calls = []
+
+    def measure():
+        calls.append(None)
+        release.wait(2)
+        return 1
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, timeout=0.01)
+
+    collect_workers_data()
+    collect_workers_data()
+    release.set()
+    HireFire.configuration.workers[0]._pending.result(2)
+    assert len(calls) == 1
+
+
+def test_worker_executor_is_bounded_by_worker_concurrency():
+    HireFire.configuration.worker_concurrency = 3
+    executor = worker_executor()
+    assert executor._max_workers == 3
+    assert worker_executor() is executor
+
+    HireFire.configuration.worker_concurrency = 4
+    assert worker_executor()._max_workers == 4
+
+
+def test_worker_executor_has_a_thread_per_worker_with_deadlines():
+    with HireFire.configure() as config:
+        config.dyno("worker", lambda: 1, timeout=1)
+        config.dyno("mailer", lambda: 1)
+        config.dyno("scheduler", lambda: 1)
+
+    assert worker_executor()._max_workers == 3
+
+    HireFire.configuration.worker_concurrency = 8
+    assert worker_executor()._max_workers == 8
+
+
+def test_worker_executor_after_fork():
+    executor = worker_executor()
+    with patch("os.getpid", return_value=-1):
+        assert worker_executor() is not executor
+
+
+def test_collect_workers_data_serves_fresh_values_from_cache(clock):
+    calls = []
+
+    def measure():
+        calls.append(None)
+        return len(calls)
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, ttl=10)
+
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    clock.tick(9)
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    clock.tick(1)
+    assert collect_workers_data() == [{"name": "worker", "value": 2}]
+
+
+def test_collect_workers_data_serves_stale_values_while_revalidating(clock):
+    calls = []
+    release = threading.Event()
+
+    def measure():
+        calls.append(None)
+        if len(calls) > 1:
+            release.wait(2)
+        return len(calls)
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, ttl=10, stale_ttl=20)
+    worker = HireFire.configuration.workers[0]
+
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    clock.tick(15)
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    release.set()
+    assert worker._pending.result(2) == 2
+    assert len(calls) == 2
+    assert collect_workers_data() == [{"name": "worker", "value": 2}]
+
+    clock.tick(30)
+    assert collect_workers_data() == [{"name": "worker", "value": 3}]
+
+
+def test_collect_workers_data_shares_one_computation_between_requests():
+    calls = []
+    barrier = threading.Barrier(4, timeout=2)
+
+    def measure():
+        calls.append(None)
+        time.sleep(0.1)
+        return 1
+
+    with HireFire.configure() as config:
+        config.worker_concurrency = 8
+        config.dyno("worker", measure)
+        config.dyno("mailer", lambda: 2)
+
+    results = []
+
+    def poll():
+        barrier.wait()
+        results.append(collect_workers_data())
+
+    threads = [threading.Thread(target=poll) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (
+        results
+        == [[{"name": "worker", "value": 1}, {"name": "mailer", "value": 2}]] * 4
+    )
+    assert len(calls) == 1
+
+
+def test_collect_workers_data_shares_one_computation_for_cached_worker():
+    calls = []
+    barrier = threading.Barrier(5, timeout=2)
+
+    def measure():
+        calls.append(None)
+        time.sleep(0.1)
+        return 1
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, ttl=10)
+
+    results = []
+
+    def poll():
+        barrier.wait()
+        results.append(collect_workers_data())
+
+    threads = [threading.Thread(target=poll) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [[{"name": "worker", "value": 1}]] * 5
+    assert len(calls) == 1
+
+
+def test_collect_workers_data_with_cache_shared_between_processes():
+    cache = MemoryCache()
+    calls = []
+
+    def measure():
+        calls.append(None)
+        return 1
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, ttl=10, cache=cache)
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+
+    # Another process has its own worker, backed by the same cache.
+    HireFire.configuration.workers.clear()
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, ttl=10, cache=cache)
+    assert collect_workers_data() == [{"name": "worker", "value": 1}]
+    assert len(calls) == 1
+
+
+def test_collect_workers_data_from_refresher_snapshot():
+    calls = []
+    slow = threading.Event()
+    release = threading.Event()
+
+    def measure():
+        calls.append(None)
+        if slow.is_set():
+            release.wait(2)
+        return 1
+
+    with HireFire.configure() as config:
+        config.refresh_interval = 0.01
+        config.dyno("worker", measure)
+        config.dyno("mailer", lambda: 2, refresh_interval=60)
+
+    try:
+        assert collect_workers_data() == [
+            {"name": "worker", "value": 1},
+            {"name": "mailer", "value": 2},
+        ]
+        assert HireFire.configuration.refresher.running
+
+        # While the refresher waits on a slow broker, the snapshot is served, flagged as stale
+        # once it wasn't refreshed for several intervals.
+        slow.set()
+        count = len(calls)
+        deadline = time.monotonic() + 2
+        while len(calls) == count:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        time.sleep(0.05)
+        started = time.monotonic()
+        assert collect_workers_data()[0] == {
+            "name": "worker",
+            "value": 1,
+            "stale": True,
+        }
+        assert time.monotonic() - started < 0.5
+    finally:
+        release.set()
+        HireFire.configuration.refresher.stop()
+
+
+def test_collect_workers_data_flags_failed_refreshes_as_stale():
+    failing = threading.Event()
+
+    def measure():
+        if failing.is_set():
+            raise ConnectionError("broker unavailable")
+        return 1
+
+    with HireFire.configure() as config:
+        config.dyno("worker", measure, refresh_interval=0.01)
+
+    try:
+        with patch.object(HireFire.configuration.logger, "error"):
+            assert collect_workers_data() == [{"name": "worker", "value": 1}]
+            failing.set()
+            deadline = time.monotonic() + 2
+            while "stale" not in collect_workers_data()[0]:
+                assert time.monotonic() < deadline
+                time.sleep(0.005)
+
+        assert collect_workers_data() == [{"name": "worker", "value": 1, "stale": True}]
+    finally:
+        HireFire.configuration.refresher.stop()
+
+
+def test_collect_workers_data_keeps_refreshing_others_while_one_hangs():
+    release = threading.Event()
+    worker_calls = []
+    mailer_calls = []
+
+    def measure(calls, hang):
+        def proc():
+            calls.append(None)
+            if hang and len(calls) > 1:
+                release.wait(2)
+            return len(calls)
+
+        return proc
+
+    with HireFire.configure() as config:
+        config.refresh_interval = 0.01
+        config.dyno("worker", measure(worker_calls, True))
+        config.dyno("mailer", measure(mailer_calls, False))
+
+    try:
+        start_refresher(HireFire.configuration)
+        deadline = time.monotonic() + 2
+        while len(worker_calls) < 2 or len(mailer_calls) < 5:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+
+        # The hung worker's value is flagged as stale once it's several intervals old.
+        time.sleep(0.05)
+        assert collect_workers_data()[0] == {
+            "name": "worker",
+            "value": 1,
+            "stale": True,
+        }
+        assert collect_workers_data()[1]["value"] >= 5
+    finally:
+        release.set()
+        HireFire.configuration.refresher.stop()
@@ -9,7 +9,10 @@ from freezegun import freeze_time
 
 from hirefire_resource import HireFire
 from hirefire_resource.configuration import Configuration
-from hirefire_resource.middleware.wsgi.django import HireFireMiddleware
+from hirefire_resource.middleware.wsgi.django import (
+    HireFireMiddleware,
+    iscoroutinefunction,
+)
 from hirefire_resource.version import VERSION
 from tests.helpers import HIREFIRE_TOKEN, set_HIREFIRE_TOKEN  # noqa
 
@@ -113,3 +116,76 @@ def test_intercept_and_process_worker_configuration_with_token(
     assert response.headers == expected_headers
     assert response.status_code == 200
     assert json.loads(response.content) == [{"name": "worker", "value": 1.23}]
+
+
+class AsyncClient(Client):
+    async def request(self, path, **kwargs):
+        request = self.factory.get(path, **kwargs)
+        middleware = HireFireMiddleware(self.default_view)
+        assert iscoroutinefunction(middleware)
+        return await middleware(request)
+
+    async def default_view(self, request):
+        return HttpResponse("DEFAULT")
+
+
+@pytest.fixture
+def async_client():
+    return AsyncClient(RequestFactory())
+
+
+async def measure_async_queue_metric():
+    return 4.56
+
+
+def test_sync_mode():
+    middleware = HireFireMiddleware(lambda request: HttpResponse("DEFAULT"))
+    assert HireFireMiddleware.sync_capable
+    assert not middleware.async_mode
+    assert not iscoroutinefunction(middleware)
+
+
+@pytest.mark.asyncio
+@freeze_time("2000-01-01 00:00:00")
+async def test_async_pass_through_and_process_web_configuration(
+    async_client, set_HIREFIRE_TOKEN
+):
+    with HireFire.configure() as config:
+        config.dyno("web")
+    with patch.object(HireFire.configuration.web, "start_dispatcher") as mock_start:
+        response = await async_client.request(
+            "/", **{"HTTP_X_REQUEST_START": str(int(time.time() * 1000 - 5))}
+        )
+        assert response.status_code == 200
+        assert response.content.decode("utf-8") == "DEFAULT"
+        assert HireFire.configuration.web._buffer == {946684800: [5]}
+        mock_start.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_async_intercept_and_await_worker_configuration(
+    async_client, set_HIREFIRE_TOKEN
+):
+    with HireFire.configure() as config:
+        config.dyno("worker", measure_queue_metric)
+        config.dyno("async_worker", measure_async_queue_metric)
+    response = await async_client.request(f"/hirefire/{HIREFIRE_TOKEN}/info")
+    assert response.status_code == 200
+    assert response["content-type"] == "application/json"
+    assert json.loads(response.content) == [
+        {"name": "worker", "value": 1.23},
+        {"name": "async_worker", "value": 4.56},
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_async_evaluates_sync_procs_that_use_the_orm(
+    async_client, set_HIREFIRE_TOKEN
+):
+    from django.contrib.auth.models import User
+
+    with HireFire.configure() as config:
+        config.dyno("worker", lambda: User.objects.count())
+    response = await async_client.request(f"/hirefire/{HIREFIRE_TOKEN}/info")
+    assert json.loads(response.content) == [{"name": "worker", "value": 0}]
@@ -2,7 +2,7 @@ import time
 from unittest.mock import patch
 
 import pytest
-from flask import Flask
+from flask import Flask, current_app
 from freezegun import freeze_time
 
 from hirefire_resource import HireFire
@@ -103,3 +103,41 @@ def test_intercept_and_process_worker_configuration_with_token(
     assert response.headers["Content-Type"] == "application/json"
     assert response.headers["Cache-Control"] == "must-revalidate, private, max-age=0"
     assert response.headers["Hirefire-Resource"] == f"Python-{VERSION}"
+
+
+def test_pass_through_without_request_context(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web")
+    with patch.object(HireFire.configuration.web, "start_dispatcher"):
+        with patch.object(app, "request_context", wraps=app.request_context) as context:
+            response = client.get("/any", headers={"X_REQUEST_START": "1"})
+    assert response.data.decode("utf-8") == "DEFAULT"
+    # Only pushed by the application itself.
+    assert context.call_count == 1
+
+
+def test_intercept_with_application_context(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("worker", lambda: len(current_app.name))
+
+    response = client.get(f"/hirefire/{HIREFIRE_TOKEN}/info")
+    assert response.status_code == 200
+    assert response.json == [{"name": "worker", "value": len(app.name)}]
+
+
+@pytest.mark.parametrize("options", [{"worker_concurrency": 8}, {"info_timeout": 2}])
+def test_intercept_with_application_context_in_worker_threads(
+    client, set_HIREFIRE_TOKEN, options
+):
+    with HireFire.configure() as config:
+        for option, value in options.items():
+            setattr(config, option, value)
+        config.dyno("worker", lambda: len(current_app.name))
+        config.dyno("mailer", lambda: 2)
+
+    response = client.get(f"/hirefire/{HIREFIRE_TOKEN}/info")
+    assert response.status_code == 200
+    assert response.json == [
+        {"name": "worker", "value": len(app.name)},
+        {"name": "mailer", "value": 2},
+    ]
@@ -0,0 +1,115 @@
+import json
+import time
+from unittest.mock import patch
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+from freezegun import freeze_time
+
+from hirefire_resource import HireFire
+from hirefire_resource.configuration import Configuration
+from hirefire_resource.middleware.wsgi.raw import HireFireMiddleware
+from hirefire_resource.version import VERSION
+from tests.helpers import HIREFIRE_TOKEN, set_HIREFIRE_TOKEN  # noqa
+
+
+def default_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"DEFAULT"]
+
+
+class Client:
+    def __init__(self, app):
+        self.app = app
+
+    def get(self, path, headers=None):
+        environ = {"PATH_INFO": path}
+        for name, value in (headers or {}).items():
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+        setup_testing_defaults(environ)
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = dict(headers)
+
+        response["body"] = b"".join(self.app(environ, start_response))
+        return response
+
+
+@pytest.fixture(autouse=True)
+def setup():
+    HireFire.configuration = Configuration()
+    yield
+
+
+@pytest.fixture
+def client():
+    return Client(HireFireMiddleware(default_app))
+
+
+def measure_queue_metric():
+    return 1.23
+
+
+def test_pass_through_without_HIREFIRE_TOKEN(client):
+    with HireFire.configure() as config:
+        config.dyno("web")
+        config.dyno("worker", measure_queue_metric)
+    with patch.object(HireFire.configuration.web, "start_dispatcher") as mock_start:
+        response = client.get("/", headers={"X-Request-Start": "1"})
+        assert response["status"] == "200 OK"
+        assert response["body"] == b"DEFAULT"
+        mock_start.assert_not_called()
+
+
+@freeze_time("2000-01-01 00:00:00")
+def test_pass_through_without_configuration(client, set_HIREFIRE_TOKEN):
+    response = client.get("/", headers={"X-Request-Start": "1"})
+    assert response["status"] == "200 OK"
+    assert response["body"] == b"DEFAULT"
+
+
+@freeze_time("2000-01-01 00:00:00")
+def test_pass_through_and_process_web_configuration(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("web")
+    with patch.object(HireFire.configuration.web, "start_dispatcher") as mock_start:
+        response = client.get(
+            "/", headers={"X-Request-Start": str(int(time.time() * 1000 - 5))}
+        )
+        assert response["body"] == b"DEFAULT"
+        assert HireFire.configuration.web._buffer == {946684800: [5]}
+        mock_start.assert_called()
+
+
+@freeze_time("2000-01-01 00:00:00")
+def test_intercept_and_process_worker_configuration(client, set_HIREFIRE_TOKEN):
+    with HireFire.configure() as config:
+        config.dyno("worker", measure_queue_metric)
+    response = client.get(
+        f"/hirefire/{HIREFIRE_TOKEN}/info", headers={"X-Request-Start": "1"}
+    )
+    assert response["status"] == "200 OK"
+    assert json.loads(response["body"]) == [{"name": "worker", "value": 1.23}]
+    assert response["headers"] == {
+        "Content-Type": "application/json",
+        "Cache-Control": "must-revalidate, private, max-age=0",
+        "HireFire-Resource": f"Python-{VERSION}",
+        "Content-Length": str(len(response["body"])),
+    }
+
+
+@freeze_time("2000-01-01 00:00:00")
+def test_intercept_and_process_worker_configuration_with_token(
+    client, set_HIREFIRE_TOKEN
+):
+    with HireFire.configure() as config:
+        config.dyno("worker", measure_queue_metric)
+    response = client.get(
+        "/hirefire", headers={"X-Request-Start": "1", "HireFire-Token": HIREFIRE_TOKEN}
+    )
+    assert response["status"] == "200 OK"
+    assert json.loads(response["body"]) == [{"name": "worker", "value": 1.23}]
+    assert response["headers"]["Content-Type"] == "application/json"
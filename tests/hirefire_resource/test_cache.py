@@ -0,0 +1,80 @@
+import json
+import threading
+
+from hirefire_resource.cache import MemoryCache, RedisCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        if px is not None:
+            self.expiry[key] = px
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token.encode():
+            del self.data[key]
+            return 1
+        return 0
+
+
+def test_memory_cache():
+    cache = MemoryCache()
+    assert cache.get("worker") is None
+    cache.set("worker", 1.23, 1000)
+    assert cache.get("worker") == (1.23, 1000)
+    assert cache.acquire("worker", 60)
+    assert cache.acquire("worker", 60)
+
+
+def test_redis_cache():
+    client = FakeRedis()
+    cache = RedisCache(client)
+    assert cache.get("worker") is None
+    cache.set("worker", 1.23, 1000)
+    assert json.loads(client.data["hirefire-resource:worker"]) == [1.23, 1000]
+    assert cache.get("worker") == (1.23, 1000)
+
+
+def test_redis_cache_shared_between_processes():
+    client = FakeRedis()
+    RedisCache(client).set("worker", 5, 1000)
+    assert RedisCache(client).get("worker") == (5, 1000)
+
+
+def test_redis_cache_lock():
+    client = FakeRedis()
+    cache = RedisCache(client, prefix="app")
+    other = RedisCache(client, prefix="app")
+
+    assert cache.acquire("worker", 1.5)
+    assert client.expiry["app:worker:lock"] == 1500
+    assert not other.acquire("worker", 1.5)
+
+    other.release("worker")
+    assert "app:worker:lock" in client.data
+
+    cache.release("worker")
+    assert "app:worker:lock" not in client.data
+    assert other.acquire("worker", 1.5)
+
+
+def test_redis_cache_lock_released_from_another_thread():
+    client = FakeRedis()
+    cache = RedisCache(client)
+
+    assert cache.acquire("worker", 60)
+    thread = threading.Thread(target=cache.release, args=("worker",))
+    thread.start()
+    thread.join()
+
+    assert "hirefire-resource:worker:lock" not in client.data
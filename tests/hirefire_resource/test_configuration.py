@@ -1,4 +1,5 @@
 from hirefire_resource.configuration import Configuration
+from hirefire_resource.histogram import Histogram
 from hirefire_resource.web import Web
 
 
@@ -8,6 +9,12 @@ def test_web():
     assert isinstance(config.web, Web)
 
 
+def test_web_options():
+    config = Configuration()
+    config.dyno("web", aggregate=True)
+    assert config.web._bucket_factory is Histogram
+
+
 def test_workers():
     config = Configuration()
     config.dyno("worker", lambda: 1.23)
@@ -17,3 +24,17 @@ def test_workers():
     assert config.workers[0].value() == 1.23
     assert config.workers[1].name == "mailer"
     assert config.workers[1].value() == 2.46
+
+
+def test_worker_options():
+    config = Configuration()
+    config.dyno("worker", lambda: 1.23, timeout=5)
+    assert config.workers[0].timeout == 5
+
+
+def test_refresh_options():
+    config = Configuration()
+    assert config.refresh_interval is None
+    config.dyno("worker", lambda: 1.23, refresh_interval=10)
+    assert config.workers[0].refresh_interval == 10
+    assert config.refresher.enabled
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from freezegun import freeze_time
+
+from hirefire_resource.dispatch_policy import DispatchPolicy
+
+
+def test_interval_with_jitter():
+    policy = DispatchPolicy(jitter=0.1)
+    for _ in range(100):
+        assert 0.9 <= policy.interval(1) <= 1.1
+
+
+def test_interval_without_jitter():
+    policy = DispatchPolicy(jitter=0)
+    assert policy.interval(1) == 1
+
+
+def test_interval_backs_off_exponentially():
+    policy = DispatchPolicy(jitter=0, max_interval=30)
+    intervals = []
+    for _ in range(6):
+        policy.record_failure(1)
+        intervals.append(policy.interval(1))
+    assert intervals == [2, 4, 8, 16, 30, 30]
+    policy.record_success()
+    assert policy.interval(1) == 1
+
+
+def test_circuit_opens_after_failure_threshold():
+    policy = DispatchPolicy(failure_threshold=3)
+    with freeze_time("2000-01-01 00:00:00"):
+        for _ in range(2):
+            policy.record_failure(1)
+            assert policy.state == DispatchPolicy.CLOSED
+            assert policy.allow()
+        policy.record_failure(1)
+        assert policy.state == DispatchPolicy.OPEN
+        assert not policy.allow()
+
+
+def test_circuit_half_opens_after_backoff():
+    policy = DispatchPolicy(failure_threshold=1)
+    with freeze_time("2000-01-01 00:00:00") as frozen_time:
+        policy.record_failure(1)
+        assert not policy.allow()
+        frozen_time.tick(1)
+        assert not policy.allow()
+        frozen_time.tick(1)
+        assert policy.allow()
+        assert policy.state == DispatchPolicy.HALF_OPEN
+
+
+def test_failed_trial_opens_circuit_again():
+    policy = DispatchPolicy(failure_threshold=1)
+    with freeze_time("2000-01-01 00:00:00") as frozen_time:
+        policy.record_failure(1)
+        frozen_time.tick(2)
+        assert policy.allow()
+        policy.record_failure(1)
+        assert policy.state == DispatchPolicy.OPEN
+        assert not policy.allow()
+
+
+def test_successful_trial_closes_circuit():
+    policy = DispatchPolicy(failure_threshold=1)
+    with freeze_time("2000-01-01 00:00:00") as frozen_time:
+        policy.record_failure(1)
+        frozen_time.tick(2)
+        assert policy.allow()
+        policy.record_success()
+        assert policy.state == DispatchPolicy.CLOSED
+        assert policy.failures == 0
+
+
+def test_jitter_is_random():
+    policy = DispatchPolicy(jitter=0.5)
+    with patch("random.uniform", return_value=1.25) as uniform:
+        assert policy.interval(2) == 2.5
+    uniform.assert_called_once_with(0.5, 1.5)
@@ -0,0 +1,55 @@
+import socket
+
+from hirefire_resource.dispatch_stats import DispatchStats
+from hirefire_resource.web import DispatchError
+
+
+def test_latency():
+    stats = DispatchStats()
+    assert stats.latency() is None
+    assert stats.latency(50) is None
+
+    for latency in range(1, 101):
+        stats.record_dispatch(latency)
+
+    assert stats.dispatches == 100
+    assert stats.latency() == 100
+    assert stats.latency(50) == 51
+    assert stats.latency(99) == 100
+
+
+def test_latency_window():
+    stats = DispatchStats(window=10)
+    for latency in range(100):
+        stats.record_dispatch(latency)
+    assert stats.dispatches == 100
+    assert list(stats.latencies) == list(range(90, 100))
+
+
+def test_failures_by_type():
+    stats = DispatchStats()
+    stats.record_failure(DispatchError("HTTP error occurred: 500", status=500))
+    stats.record_failure(DispatchError("HTTP error occurred: 500", status=500), 5)
+    stats.record_failure(DispatchError("The HIREFIRE_TOKEN environment variable"))
+    assert stats.failures == {"HTTP 500": 2, "DispatchError": 1}
+    assert list(stats.latencies) == [5]
+
+
+def test_failure_type_from_context():
+    try:
+        try:
+            raise socket.timeout()
+        except socket.timeout:
+            raise DispatchError("The request to the server timed out.")
+    except DispatchError as e:
+        error = e
+
+    assert DispatchStats.failure_type(error) == type(socket.timeout()).__name__
+
+
+def test_record_lock_wait():
+    stats = DispatchStats()
+    stats.record_lock_wait(100)
+    stats.record_lock_wait(50)
+    assert stats.lock_contentions == 2
+    assert stats.lock_wait_ns == 150
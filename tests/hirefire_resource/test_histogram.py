@@ -0,0 +1,110 @@
+from hirefire_resource.histogram import Histogram
+
+
+def test_append():
+    histogram = Histogram()
+    for value in [0, 1, 2, 3, 4, 7, 8]:
+        histogram.append(value)
+
+    assert histogram.to_dict() == {
+        "count": 7,
+        "sum": 25,
+        "min": 0,
+        "max": 8,
+        "buckets": [1, 1, 2, 2, 1],
+    }
+    assert len(histogram) == 7
+
+
+def test_append_beyond_last_bucket():
+    histogram = Histogram()
+    histogram.append(2**40)
+    assert histogram.buckets[-1] == 1
+
+
+def test_extend():
+    histogram_1 = Histogram()
+    histogram_1.append(5)
+    histogram_1.append(10)
+
+    histogram_2 = Histogram()
+    histogram_2.append(1)
+    histogram_2.append(20)
+
+    histogram_1.extend(histogram_2)
+
+    assert histogram_1.to_dict() == {
+        "count": 4,
+        "sum": 36,
+        "min": 1,
+        "max": 20,
+        "buckets": [0, 1, 0, 1, 1, 1],
+    }
+
+
+def test_extend_empty():
+    histogram = Histogram()
+    histogram.append(5)
+    histogram.extend(Histogram())
+    assert histogram.to_dict() == {
+        "count": 1,
+        "sum": 5,
+        "min": 5,
+        "max": 5,
+        "buckets": [0, 0, 0, 1],
+    }
+
+
+def test_empty():
+    assert Histogram().to_dict() == {
+        "count": 0,
+        "sum": 0,
+        "min": None,
+        "max": None,
+        "buckets": [],
+    }
+
+
+def test_to_list():
+    histogram = Histogram()
+    for value in [0, 1, 2, 3, 5, 6, 40, 41]:
+        histogram.append(value)
+    assert histogram.to_list() == [0, 1, 3, 3, 6, 7, 37, 41]
+
+
+def test_to_list_keeps_sum_min_and_max():
+    histogram = Histogram()
+    for _ in range(99):
+        histogram.append(513)
+    histogram.append(1023)
+    values = histogram.to_list()
+    assert len(values) == 100
+    assert sum(values) == histogram.sum == 51810
+    assert values[0] == 513
+    assert values[-1] == 1023
+    assert values == sorted(values)
+
+
+def test_to_list_keeps_values_within_their_buckets():
+    histogram = Histogram()
+    for value in [3, 5, 6, 7, 100, 1500, 2**40]:
+        histogram.append(value)
+    values = histogram.to_list()
+    assert sum(values) == histogram.sum
+    assert values[0] == 3
+    assert values[-1] == 2**40
+    assert [value.bit_length() for value in values] == [2, 3, 3, 3, 7, 11, 41]
+
+
+def test_to_list_empty():
+    assert Histogram().to_list() == []
+
+
+def test_equality():
+    histogram_1 = Histogram()
+    histogram_1.append(5)
+    histogram_2 = Histogram()
+    histogram_2.append(5)
+    assert histogram_1 == histogram_2
+    histogram_2.append(6)
+    assert histogram_1 != histogram_2
@@ -0,0 +1,257 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from hirefire_resource.configuration import Configuration
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+async def async_wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.005)
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+@pytest.fixture
+def config(executor):
+    config = Configuration()
+    config.refresher.jitter = 0
+    yield config
+    config.refresher.stop()
+
+
+def counter(values=None):
+    calls = []
+
+    def proc():
+        calls.append(time.monotonic())
+        return len(calls) if values is None else values[len(calls) - 1]
+
+    return proc, calls
+
+
+def test_enabled(config):
+    config.dyno("worker", lambda: 1)
+    assert not config.refresher.enabled
+    config.dyno("mailer", lambda: 1, refresh_interval=5)
+    assert config.refresher.enabled
+    assert config.refresher.interval(config.workers[0]) is None
+    assert config.refresher.interval(config.workers[1]) == 5
+    config.refresh_interval = 10
+    assert config.refresher.interval(config.workers[0]) == 10
+    assert config.refresher.interval(config.workers[1]) == 5
+
+
+def test_refreshes_workers_on_their_own_interval(config, executor):
+    fast, fast_calls = counter()
+    slow, slow_calls = counter()
+    config.dyno("fast", fast, refresh_interval=0.05)
+    config.dyno("slow", slow, refresh_interval=10)
+    config.dyno("manual", lambda: 1)
+
+    assert config.refresher.start(executor)
+    assert not config.refresher.start(executor)
+    wait_until(lambda: len(fast_calls) >= 3)
+
+    assert len(slow_calls) == 1
+    assert config.refresher.get(config.workers[0])[0] >= 3
+    assert config.refresher.get(config.workers[1])[0] == 1
+    assert config.refresher.get(config.workers[2]) is None
+    assert set(config.refresher.snapshot()) == {"fast", "slow"}
+    assert config.workers[0].last_value >= 3
+
+
+def test_stop(config, executor):
+    proc, calls = counter()
+    config.dyno("worker", proc, refresh_interval=0.01)
+    config.refresher.start(executor)
+    wait_until(lambda: calls)
+
+    assert config.refresher.stop()
+    assert not config.refresher.running
+    assert not config.refresher.stop()
+    count = len(calls)
+    time.sleep(0.05)
+    assert len(calls) <= count + 1
+
+
+def test_failure_flags_value_as_stale_and_backs_off(config, executor):
+    def proc():
+        calls.append(None)
+        if len(calls) > 1:
+            raise ConnectionError("broker unavailable")
+        return 7
+
+    calls = []
+    config.dyno("worker", proc, refresh_interval=0.01)
+    config.refresher.max_backoff = 0.04
+
+    with patch.object(config.logger, "error") as error:
+        config.refresher.start(executor)
+        wait_until(lambda: len(calls) >= 4)
+
+    assert config.refresher.get(config.workers[0])[0] == 7
+    assert config.refresher.get(config.workers[0])[2] is True
+    assert config.refresher._policies["worker"].failures >= 3
+    assert config.refresher._policies["worker"].interval(0.01) == 0.04
+    error.assert_any_call(
+        "[HireFire] Unable to refresh worker: broker unavailable. "
+        "Retrying in 0.0 seconds."
+    )
+
+
+def test_recovery_clears_stale_flag(config, executor):
+    values = iter([1, None, 3])
+
+    def proc():
+        value = next(values, 3)
+        if value is None:
+            raise ConnectionError("broker unavailable")
+        return value
+
+    config.dyno("worker", proc, refresh_interval=0.01)
+
+    with patch.object(config.logger, "error"):
+        config.refresher.start(executor)
+        wait_until(lambda: (config.refresher.get(config.workers[0]) or [0])[0] == 3)
+
+    assert config.refresher.get(config.workers[0])[2] is False
+    assert config.refresher._policies["worker"].failures == 0
+
+
+def test_interval_is_jittered(config, executor):
+    config.refresher.jitter = 0.5
+    config.dyno("worker", lambda: 1, refresh_interval=60)
+
+    with patch("random.uniform", return_value=1.25) as uniform:
+        config.refresher.start(executor)
+        wait_until(lambda: config.refresher._due.get("worker"))
+
+    uniform.assert_called_with(0.5, 1.5)
+    assert 74 < config.refresher._due["worker"] - time.monotonic() <= 75
+
+
+def test_coroutine_procs_in_thread(config, executor):
+    async def proc():
+        await asyncio.sleep(0)
+        return 5
+
+    config.dyno("worker", proc, refresh_interval=10)
+    config.refresher.start(executor)
+    wait_until(lambda: config.refresher.get(config.workers[0]))
+
+    assert config.refresher.get(config.workers[0])[0] == 5
+
+
+@pytest.mark.asyncio
+async def test_refreshes_workers_in_task(config, executor):
+    loop = asyncio.get_running_loop()
+    loops = []
+
+    async def proc():
+        loops.append(asyncio.get_running_loop())
+        return 5
+
+    config.dyno("worker", proc, refresh_interval=0.01)
+    config.dyno("mailer", lambda: 6, refresh_interval=10)
+
+    assert config.refresher.start(executor, asynchronous=True)
+    assert isinstance(config.refresher._runner, asyncio.Task)
+    await async_wait_until(lambda: len(loops) >= 3)
+
+    assert loops[0] is loop
+    assert config.refresher.get(config.workers[0])[0] == 5
+    assert config.refresher.get(config.workers[1])[0] == 6
+
+    config.refresher.stop()
+    await asyncio.sleep(0)
+    assert not config.refresher.running
+
+
+def test_restarts_after_event_loop_closes(config, executor):
+    config.dyno("worker", lambda: 1, refresh_interval=10)
+
+    async def start():
+        return config.refresher.start(executor, asynchronous=True)
+
+    assert asyncio.run(start())
+    assert not config.refresher.running
+    assert config.refresher.start(executor)
+    assert isinstance(config.refresher._runner, threading.Thread)
+
+
+def test_reinitialize_after_fork(config, executor):
+    config.dyno("worker", lambda: 1, refresh_interval=10)
+    config.refresher.start(executor)
+    wait_until(lambda: config.refresher.get(config.workers[0]))
+
+    config.refresher._reinitialize_after_fork()
+
+    assert not config.refresher.running
+    assert config.refresher.get(config.workers[0])[0] == 1
+    assert config.refresher.start(executor)
+
+
+def test_refresh_that_misses_its_deadline_flags_value_as_stale(config, executor):
+    release = threading.Event()
+    calls = []
+
+    def proc():
+        calls.append(None)
+        if len(calls) == 2:
+            release.wait(2)
+        return len(calls)
+
+    mailer, mailer_calls = counter()
+    config.dyno("worker", proc, refresh_interval=0.01, timeout=0.02)
+    config.dyno("mailer", mailer, refresh_interval=0.01)
+    config.refresher.max_backoff = 0.01
+
+    with patch.object(config.logger, "error") as error:
+        config.refresher.start(executor)
+        wait_until(lambda: (config.refresher.get(config.workers[0]) or (0, 0, 0))[2])
+        count = len(mailer_calls)
+        wait_until(lambda: len(mailer_calls) > count + 2)
+
+    # The refresh that missed its deadline is waited on again rather than started anew.
+    assert len(calls) == 2
+    assert config.refresher.get(config.workers[0])[0] == 1
+    assert config.refresher.get(config.workers[0])[2] is True
+    error.assert_any_call(
+        "[HireFire] Unable to refresh worker: it didn't finish before its deadline. "
+        "Retrying in 0.0 seconds."
+    )
+
+    release.set()
+    wait_until(lambda: config.refresher.get(config.workers[0])[0] >= 2)
+    assert config.refresher.get(config.workers[0])[2] is False
+
+
+def test_value_not_refreshed_for_several_intervals_is_stale(config):
+    config.dyno("worker", lambda: 1, refresh_interval=10)
+    worker = config.workers[0]
+    measured_at = time.time() - 29
+    config.refresher._snapshot["worker"] = (1, measured_at, False)
+    assert config.refresher.get(worker) == (1, measured_at, False)
+
+    measured_at = time.time() - 31
+    config.refresher._snapshot["worker"] = (1, measured_at, False)
+    assert config.refresher.get(worker) == (1, measured_at, True)
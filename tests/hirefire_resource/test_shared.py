@@ -0,0 +1,178 @@
+import multiprocessing
+import os
+
+import pytest
+
+from hirefire_resource.histogram import Histogram
+from hirefire_resource.shared import SharedBuffer
+
+context = multiprocessing.get_context("fork")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "hirefire-web")
+
+
+def run_in_process(target, *args):
+    process = context.Process(target=target, args=args)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def record(path, timestamp, values):
+    buffer = SharedBuffer(path)
+    for value in values:
+        assert buffer.add(timestamp, value)
+    buffer.close()
+
+
+def histogram(*values):
+    histogram = Histogram()
+    for value in values:
+        histogram.append(value)
+    return histogram
+
+
+def test_collects_samples_from_all_processes(path):
+    for values in [[5, 10], [15], [20, 25]]:
+        assert run_in_process(record, path, 1000, values) == 0
+
+    assert run_in_process(record, path, 1001, [30]) == 0
+
+    buffer = SharedBuffer(path)
+    assert buffer.lead()
+    assert buffer.collect(1003) == {
+        1000: histogram(5, 10, 15, 20, 25),
+        1001: histogram(30),
+    }
+    assert buffer.collect(1003) == {}
+    buffer.close()
+
+
+def test_leaves_current_and_previous_second_uncollected(path):
+    assert run_in_process(record, path, 1000, [5]) == 0
+    assert run_in_process(record, path, 1001, [10]) == 0
+
+    buffer = SharedBuffer(path)
+    assert buffer.lead()
+    assert buffer.collect(1002) == {1000: histogram(5)}
+    assert buffer.collect(1003) == {1001: histogram(10)}
+    buffer.close()
+
+
+def test_collects_samples_from_crashed_process(path):
+    def crash():
+        buffer = SharedBuffer(path)
+        buffer.add(1000, 5)
+        os._exit(1)
+
+    assert run_in_process(crash) == 1
+
+    buffer = SharedBuffer(path)
+    assert buffer.lead()
+    assert buffer.collect(1002) == {1000: histogram(5)}
+    buffer.close()
+
+
+def test_single_leader_with_failover(path):
+    ready = context.Event()
+    done = context.Event()
+
+    def leader():
+        buffer = SharedBuffer(path)
+        assert buffer.lead()
+        ready.set()
+        done.wait(5)
+
+    process = context.Process(target=leader)
+    process.start()
+    ready.wait(5)
+
+    buffer = SharedBuffer(path)
+    assert not buffer.lead()
+
+    done.set()
+    process.join()
+
+    assert buffer.lead()
+    buffer.close()
+
+
+def test_new_leader_resumes_from_last_collected_second(path):
+    def collect():
+        buffer = SharedBuffer(path)
+        assert buffer.lead()
+        assert buffer.collect(1002) == {1000: histogram(5)}
+
+    assert run_in_process(record, path, 1000, [5]) == 0
+    assert run_in_process(collect) == 0
+    assert run_in_process(record, path, 1001, [10]) == 0
+
+    buffer = SharedBuffer(path)
+    assert buffer.lead()
+    assert buffer.collect(1003) == {1001: histogram(10)}
+    buffer.close()
+
+
+def test_reuses_ring_entries(path):
+    assert run_in_process(record, path, 1000, [5]) == 0
+    assert run_in_process(record, path, 1000 + SharedBuffer.RING, [10]) == 0
+
+    buffer = SharedBuffer(path)
+    assert buffer.lead()
+    assert buffer.collect(1002 + SharedBuffer.RING) == {
+        1000 + SharedBuffer.RING: histogram(10)
+    }
+    buffer.close()
+
+
+def test_attaches_again_after_fork(path):
+    buffer = SharedBuffer(path)
+    assert buffer.add(1000, 5)
+
+    def child():
+        assert buffer.add(1000, 10)
+        assert buffer._region != parent_region
+
+    parent_region = buffer._region
+    assert run_in_process(child) == 0
+    assert buffer.lead()
+    assert buffer.collect(1002) == {1000: histogram(5, 10)}
+    buffer.close()
+
+
+def test_buffers_of_the_same_process_claim_their_own_slot(path):
+    first = SharedBuffer(path)
+    second = SharedBuffer(path)
+    assert first.add(1000, 5)
+    assert second.add(1000, 10)
+    assert first._region != second._region
+    assert first._file is second._file
+
+    assert first.lead()
+    assert not second.lead()
+    assert first.collect(1002) == {1000: histogram(5, 10)}
+    first.close()
+    second.close()
+
+
+def test_closing_a_buffer_keeps_the_locks_of_the_others(path):
+    def lead():
+        buffer = SharedBuffer(path)
+        assert not buffer.lead()
+        assert buffer.add(1000, 5)
+
+    leader = SharedBuffer(path)
+    other = SharedBuffer(path)
+    assert leader.lead()
+    assert other.add(1000, 10)
+    other.close()
+
+    # Another process can't take over, nor claim the leader's slot.
+    assert run_in_process(lead) == 0
+    assert leader.collect(1002) == {1000: histogram(5, 10)}
+
+    leader.close()
+    assert SharedBuffer(path).lead()
@@ -1,7 +1,12 @@
+import asyncio
 import copy
+import http.client
 import json
 import logging
+import multiprocessing
 import socket
+import threading
+import time
 from datetime import datetime
 from unittest.mock import patch
 
@@ -17,10 +22,27 @@ from tests.helpers import HIREFIRE_TOKEN, set_HIREFIRE_TOKEN  # noqa
 
 def mock_http_response(status=200, content=""):
     httpretty.register_uri(
-        httpretty.POST, "https://logdrain.hirefire.io/", body=content, status=status
+        httpretty.POST,
+        "https://logdrain.hirefire.io/",
+        body=content,
+        status=status,
+        connection="keep-alive",
     )
 
 
+class FakeClock:
+    def __init__(self, timestamp):
+        self.now = int(timestamp * 1_000_000_000)
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.now
+
+    def tick(self, seconds):
+        self.now += int(seconds * 1_000_000_000)
+
+
 @pytest.fixture
 def configuration():
     return Configuration()
@@ -189,3 +211,758 @@ def test_submit_buffer_with_custom_dispatch_url(web, set_HIREFIRE_TOKEN, monkeyp
     web._submit_buffer({1634367001: [5]})
     last_request = httpretty.last_request()
     assert last_request.headers.get("host") == custom_dispatch_host
+
+
+@pytest.fixture
+def aggregate_web(configuration):
+    return Web(configuration, aggregate=True)
+
+
+def test_aggregate_add_to_buffer_and_flush(aggregate_web):
+    with freeze_time("2000-01-01 00:00:00"):
+        aggregate_web.add_to_buffer(5)
+        aggregate_web.add_to_buffer(10)
+
+    with freeze_time("2000-01-01 00:00:01"):
+        aggregate_web.add_to_buffer(15)
+
+    timestamp_1 = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    timestamp_2 = int(datetime(2000, 1, 1, 0, 0, 1).timestamp())
+    data = aggregate_web._flush_buffer()
+
+    assert list(data.keys()) == [timestamp_1, timestamp_2]
+    assert data[timestamp_1].to_dict() == {
+        "count": 2,
+        "sum": 15,
+        "min": 5,
+        "max": 10,
+        "buckets": [0, 0, 0, 1, 1],
+    }
+    assert data[timestamp_2].to_dict() == {
+        "count": 1,
+        "sum": 15,
+        "min": 15,
+        "max": 15,
+        "buckets": [0, 0, 0, 0, 1],
+    }
+    assert aggregate_web._buffer == {}
+
+
+@httpretty.activate
+def test_aggregate_repopulation_merges_buckets(aggregate_web):
+    mock_http_response(status=500)
+
+    with freeze_time("2000-01-01 00:00:00"):
+        aggregate_web.add_to_buffer(5)
+        buffer = aggregate_web._flush_buffer()
+        aggregate_web.add_to_buffer(10)
+        aggregate_web._repopulate_buffer(buffer)
+
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    assert aggregate_web._buffer[timestamp].to_dict() == {
+        "count": 2,
+        "sum": 15,
+        "min": 5,
+        "max": 10,
+        "buckets": [0, 0, 0, 1, 1],
+    }
+
+
+@httpretty.activate
+def test_aggregate_submit_buffer(aggregate_web, set_HIREFIRE_TOKEN):
+    mock_http_response()
+
+    with freeze_time("2000-01-01 00:00:00"):
+        aggregate_web.add_to_buffer(3)
+        aggregate_web.add_to_buffer(9)
+
+    aggregate_web._submit_buffer(aggregate_web._flush_buffer())
+
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    assert json.loads(httpretty.last_request().body) == {str(timestamp): [3, 9]}
+
+
+def test_add_to_buffer_with_injected_clock(configuration):
+    clock = FakeClock(1634367001.75)
+    web = Web(configuration, clock=clock)
+    web.add_to_buffer(5)
+    clock.tick(0.25)
+    web.add_to_buffer(10)
+    assert web._flush_buffer() == {1634367001: [5], 1634367002: [10]}
+    assert clock.reads == 2
+
+
+def test_add_to_buffer_reuses_measurement_time(configuration):
+    clock = FakeClock(1634367001)
+    web = Web(configuration, clock=clock)
+    web.add_to_buffer(5, now=1634367002 * 1_000_000_000)
+    assert web._flush_buffer() == {1634367002: [5]}
+    assert clock.reads == 0
+
+
+def test_default_clock_follows_frozen_time(web):
+    with freeze_time("2000-01-01 00:00:00"):
+        assert web.clock() == int(datetime(2000, 1, 1).timestamp()) * 1_000_000_000
+
+
+@pytest.fixture
+def sharded_web(configuration):
+    return Web(configuration, sharded=True)
+
+
+def test_sharded_add_to_buffer_and_flush(sharded_web):
+    with freeze_time("2000-01-01 00:00:00"):
+        sharded_web.add_to_buffer(5)
+        sharded_web.add_to_buffer(10)
+
+    with freeze_time("2000-01-01 00:00:01"):
+        sharded_web.add_to_buffer(15)
+
+    timestamp_1 = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    timestamp_2 = int(datetime(2000, 1, 1, 0, 0, 1).timestamp())
+    assert sharded_web._flush_buffer() == {timestamp_1: [5, 10], timestamp_2: [15]}
+    assert sharded_web._flush_buffer() == {}
+
+
+def test_sharded_collects_samples_from_all_threads(configuration):
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    sharded_web = Web(configuration, sharded=True, clock=FakeClock(timestamp))
+
+    def record():
+        for _ in range(100):
+            sharded_web.add_to_buffer(5)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sharded_web._flush_buffer() == {timestamp: [5] * 800}
+    assert sharded_web._shards == []
+
+
+@httpretty.activate
+def test_sharded_repopulation_on_dispatch_error(sharded_web):
+    mock_http_response(status=500)
+
+    with freeze_time("2000-01-01 00:00:00"):
+        sharded_web.add_to_buffer(5)
+        sharded_web._dispatch_buffer()
+        sharded_web.add_to_buffer(10)
+
+        timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+        assert sharded_web._flush_buffer() == {timestamp: [5, 10]}
+
+
+def test_sharded_aggregate(configuration):
+    web = Web(configuration, aggregate=True, sharded=True)
+
+    with freeze_time("2000-01-01 00:00:00"):
+        web.add_to_buffer(5)
+        web.add_to_buffer(10)
+
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    assert web._flush_buffer()[timestamp].to_dict() == {
+        "count": 2,
+        "sum": 15,
+        "min": 5,
+        "max": 10,
+        "buckets": [0, 0, 0, 1, 1],
+    }
+
+
+@httpretty.activate
+def test_submit_buffer_reuses_connection(web, set_HIREFIRE_TOKEN):
+    mock_http_response()
+    web._submit_buffer({1634367001: [5]})
+    connection = web._connection
+    web._submit_buffer({1634367002: [10]})
+    assert web._connection is connection
+    assert json.loads(httpretty.last_request().body) == {"1634367002": [10]}
+
+
+@httpretty.activate
+def test_submit_buffer_reconnects_on_dispatch_url_change(
+    web, set_HIREFIRE_TOKEN, monkeypatch
+):
+    mock_http_response()
+    httpretty.register_uri(
+        httpretty.POST,
+        "https://custom.hirefire.io/",
+        status=200,
+        connection="keep-alive",
+    )
+    web._submit_buffer({1634367001: [5]})
+    connection = web._connection
+    monkeypatch.setenv("HIREFIRE_DISPATCH_URL", "https://custom.hirefire.io")
+    web._submit_buffer({1634367002: [10]})
+    assert web._connection is not connection
+    assert web._connection.host == "custom.hirefire.io"
+    assert httpretty.last_request().headers.get("host") == "custom.hirefire.io"
+
+
+@httpretty.activate
+def test_submit_buffer_reconnects_after_server_close(web, set_HIREFIRE_TOKEN):
+    mock_http_response()
+    web._submit_buffer({1634367001: [5]})
+    connection = web._connection
+    with patch.object(
+        connection, "request", side_effect=http.client.RemoteDisconnected
+    ):
+        web._submit_buffer({1634367002: [10]})
+    assert web._connection is not connection
+    assert json.loads(httpretty.last_request().body) == {"1634367002": [10]}
+
+
+@httpretty.activate
+def test_submit_buffer_closes_connection_on_error(web, set_HIREFIRE_TOKEN):
+    mock_http_response(status=500)
+    with pytest.raises(DispatchError):
+        web._submit_buffer({1634367001: [5]})
+    assert web._connection is None
+
+
+@httpretty.activate
+def test_submit_buffer_closes_connection_when_server_requests_it(
+    web, set_HIREFIRE_TOKEN
+):
+    httpretty.register_uri(
+        httpretty.POST, "https://logdrain.hirefire.io/", status=200, connection="close"
+    )
+    web._submit_buffer({1634367001: [5]})
+    assert web._connection is None
+
+
+@httpretty.activate
+def test_stop_dispatcher_closes_connection(web, set_HIREFIRE_TOKEN):
+    mock_http_response()
+    web._submit_buffer({1634367001: [5]})
+    assert web._connection is not None
+    with patch("time.sleep", return_value=None):
+        web.start_dispatcher()
+        web.stop_dispatcher()
+    assert web._connection is None
+
+
+@pytest.fixture
+def async_web(configuration):
+    return Web(configuration, async_dispatcher=True)
+
+
+class FakeDispatchServer:
+    def __init__(self, headers=b"Connection: keep-alive\r\n", close=False):
+        self.headers = headers
+        self.close = close
+        self.connections = 0
+        self.requests = []
+        self.handlers = []
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.handlers.append(asyncio.current_task())
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                return
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            self.requests.append((head, await reader.readexactly(length)))
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n" + self.headers + b"\r\nOK"
+            )
+            await writer.drain()
+            if self.close:
+                writer.close()
+                return
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        open_connection = asyncio.open_connection
+
+        async def connect(host, _port, **kwargs):
+            return await open_connection("127.0.0.1", port)
+
+        self.patch = patch("asyncio.open_connection", side_effect=connect)
+        self.patch.start()
+        return self
+
+    async def __aexit__(self, *args):
+        self.patch.stop()
+        self.server.close()
+        for handler in self.handlers:
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_async_dispatcher_runs_as_task(async_web, caplog):
+    caplog.set_level(logging.INFO)
+    assert await async_web.start_async_dispatcher() == True
+    assert isinstance(async_web._dispatcher, asyncio.Task)
+    assert async_web.dispatcher_running() == True
+    assert async_web.start_dispatcher() == False
+    assert await async_web.stop_async_dispatcher() == True
+    assert async_web.dispatcher_running() == False
+    assert await async_web.stop_async_dispatcher() == False
+    assert "[HireFire] Web metrics dispatcher stopped." in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_start_async_dispatcher_requires_async_mode(web):
+    assert await web.start_async_dispatcher() == False
+    assert web.dispatcher_running() == False
+
+
+def test_async_dispatcher_falls_back_to_thread_without_event_loop(async_web):
+    with patch("time.sleep", return_value=None):
+        assert async_web.start_dispatcher() == True
+        assert isinstance(async_web._dispatcher, threading.Thread)
+        assert async_web.stop_dispatcher() == True
+
+
+def test_async_dispatcher_restarts_after_event_loop_closes(async_web):
+    async def start():
+        return async_web.start_dispatcher()
+
+    assert asyncio.run(start()) == True
+    assert async_web.dispatcher_running() == False
+
+    with patch.object(async_web, "_submit_buffer"):
+        assert async_web.start_dispatcher() == True
+        assert isinstance(async_web._dispatcher, threading.Thread)
+        assert async_web.dispatcher_running() == True
+        assert async_web.stop_dispatcher() == True
+
+
+@pytest.mark.asyncio
+async def test_stop_async_dispatcher_dispatches_remaining_buffer(async_web):
+    with patch.object(async_web, "_async_submit_buffer") as submit:
+        await async_web.start_async_dispatcher()
+        await asyncio.sleep(0)
+        with freeze_time("2000-01-01 00:00:00"):
+            async_web.add_to_buffer(5)
+        await async_web.stop_async_dispatcher()
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    submit.assert_awaited_once_with({timestamp: [5]})
+
+
+@pytest.mark.asyncio
+async def test_async_submit_buffer(async_web, set_HIREFIRE_TOKEN):
+    server = FakeDispatchServer(
+        headers=(
+            b"Connection: keep-alive\r\n"
+            b"HireFire-Resource-Dispatch-Interval: 10\r\n"
+            b"HireFire-Resource-Dispatch-Timeout: 10\r\n"
+            b"HireFire-Resource-Buffer-TTL: 120\r\n"
+        )
+    )
+    async with server:
+        response = await async_web._async_submit_buffer({1634367001: [3, 9]})
+        await async_web._async_submit_buffer({1634367002: [10]})
+    assert response.status == 200
+    assert server.connections == 1
+    head, body = server.requests[0]
+    assert head.startswith(b"POST / HTTP/1.1\r\nHost: logdrain.hirefire.io\r\n")
+    assert f"HireFire-Token: {HIREFIRE_TOKEN}".encode() in head
+    assert f"HireFire-Resource: Python-{VERSION}".encode() in head
+    assert json.loads(body) == {"1634367001": [3, 9]}
+    assert json.loads(server.requests[1][1]) == {"1634367002": [10]}
+    assert async_web._dispatch_interval == 10
+    assert async_web._dispatch_timeout == 10
+    assert async_web._buffer_ttl == 120
+
+
+@pytest.mark.asyncio
+async def test_async_submit_buffer_reconnects_after_server_close(
+    async_web, set_HIREFIRE_TOKEN
+):
+    async with FakeDispatchServer(close=True) as server:
+        await async_web._async_submit_buffer({1634367001: [5]})
+        await async_web._async_submit_buffer({1634367002: [10]})
+    assert server.connections == 2
+    assert json.loads(server.requests[1][1]) == {"1634367002": [10]}
+
+
+@pytest.mark.asyncio
+async def test_async_submit_buffer_error(async_web, set_HIREFIRE_TOKEN):
+    async with FakeDispatchServer():
+        with patch.object(
+            async_web,
+            "_async_read_response",
+            side_effect=http.client.BadStatusLine("HTTP/1.1 ???"),
+        ):
+            with pytest.raises(DispatchError) as exc_info:
+                await async_web._async_submit_buffer({1634367001: [5]})
+    assert "HTTP error occurred:" in str(exc_info.value)
+    assert async_web._async_connection is None
+
+
+def test_shared_collects_samples_from_all_processes(configuration, tmp_path):
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    clock = FakeClock(timestamp)
+    web = Web(configuration, shared=str(tmp_path / "hirefire-web"), clock=clock)
+
+    def record():
+        web.add_to_buffer(5)
+
+    for _ in range(3):
+        process = multiprocessing.get_context("fork").Process(target=record)
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+    web.add_to_buffer(10)
+
+    clock.tick(1)
+    assert web._flush_buffer() == {}
+
+    clock.tick(1)
+    buffer = web._flush_buffer()
+
+    assert buffer[timestamp].to_dict() == {
+        "count": 4,
+        "sum": 25,
+        "min": 5,
+        "max": 10,
+        "buckets": [0, 0, 0, 3, 1],
+    }
+    web._shared.close()
+
+
+def test_shared_falls_back_to_local_buffer(configuration, tmp_path):
+    web = Web(configuration, shared=str(tmp_path / "hirefire-web"))
+
+    with patch.object(web._shared, "add", return_value=False):
+        with patch.object(web._shared, "lead", return_value=False):
+            with freeze_time("2000-01-01 00:00:00"):
+                web.add_to_buffer(5)
+                buffer = web._flush_buffer()
+
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    assert buffer[timestamp].to_dict()["count"] == 1
+
+
+def test_stop_dispatcher_dispatches_remaining_buffer(web):
+    with patch.object(web, "_start_dispatcher"):
+        web.start_dispatcher()
+    with freeze_time("2000-01-01 00:00:00"):
+        web.add_to_buffer(5)
+    with patch.object(web, "_submit_buffer") as submit:
+        assert web.stop_dispatcher() == True
+    timestamp = int(datetime(2000, 1, 1, 0, 0, 0).timestamp())
+    (buffer, timeout), _ = submit.call_args
+    assert buffer == {timestamp: [5]}
+    assert 0 < timeout <= web._dispatch_timeout
+
+
+def test_stop_dispatcher_respects_deadline(web, caplog, set_HIREFIRE_TOKEN):
+    with patch.object(web, "_start_dispatcher"):
+        web.start_dispatcher()
+    with freeze_time("2000-01-01 00:00:00"):
+        web.add_to_buffer(5)
+        with patch.object(web, "_post") as post:
+            web.stop_dispatcher(timeout=0)
+        post.assert_not_called()
+    assert "The dispatch deadline was exceeded." in caplog.text
+
+
+def test_dispatcher_thread_is_daemon(web):
+    with patch.object(web, "_start_dispatcher"):
+        web.start_dispatcher()
+        assert web._dispatcher.daemon == True
+        web.stop_dispatcher()
+
+
+def test_start_dispatcher_registers_shutdown_hooks(web):
+    with patch("atexit.register") as register:
+        with patch("signal.signal") as install:
+            with patch.object(web, "_start_dispatcher"):
+                web.start_dispatcher()
+                web.stop_dispatcher()
+                web.start_dispatcher()
+                web.stop_dispatcher()
+    register.assert_called_once_with(web.stop_dispatcher)
+    install.assert_not_called()
+
+
+@httpretty.activate
+def test_reinitialize_after_fork(web, set_HIREFIRE_TOKEN):
+    mock_http_response()
+    web._submit_buffer({1634367001: [5]})
+
+    with patch.object(web, "_start_dispatcher"):
+        web.start_dispatcher()
+    web.add_to_buffer(5)
+
+    def child():
+        assert web.dispatcher_running() == False
+        assert web._dispatcher is None
+        assert web._connection is None
+        assert web._buffer == {}
+        assert web._mutex.acquire(blocking=False)
+
+    with web._mutex:
+        process = multiprocessing.get_context("fork").Process(target=child)
+        process.start()
+    process.join()
+
+    assert process.exitcode == 0
+    assert web.dispatcher_running() == True
+    assert web._buffer != {}
+    with patch.object(web, "_submit_buffer"):
+        web.stop_dispatcher()
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_dispatcher_parks_while_idle(web):
+    web._dispatch_interval = 0.01
+    with patch.object(web, "_submit_buffer") as submit:
+        with patch.object(web, "_idle", wraps=web._idle) as idle:
+            web.start_dispatcher()
+            assert wait_until(lambda: idle.call_count >= 1)
+            time.sleep(0.1)
+            assert idle.call_count == 1
+            web.add_to_buffer(5)
+            assert wait_until(lambda: submit.call_count == 1)
+            web.stop_dispatcher()
+
+
+def test_dispatcher_flushes_when_threshold_is_reached(configuration):
+    web = Web(configuration, flush_threshold=3)
+    web._dispatch_interval = 60
+    with patch.object(web, "_submit_buffer") as submit:
+        web.start_dispatcher()
+        web.add_to_buffer(5)
+        web.add_to_buffer(10)
+        time.sleep(0.1)
+        submit.assert_not_called()
+        web.add_to_buffer(15)
+        assert wait_until(lambda: submit.call_count == 1)
+        (buffer, _), _ = submit.call_args
+        assert sorted(sum(buffer.values(), [])) == [5, 10, 15]
+        web.stop_dispatcher()
+
+
+def test_stop_dispatcher_interrupts_interval(web):
+    web._dispatch_interval = 60
+    with patch.object(web, "_submit_buffer"):
+        web.start_dispatcher()
+        web.add_to_buffer(5)
+        start = time.monotonic()
+        web.stop_dispatcher()
+    assert time.monotonic() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_async_dispatcher_flushes_when_threshold_is_reached(configuration):
+    web = Web(configuration, async_dispatcher=True, flush_threshold=2)
+    web._dispatch_interval = 60
+    with patch.object(web, "_async_submit_buffer") as submit:
+        await web.start_async_dispatcher()
+        await asyncio.sleep(0.01)
+        web.add_to_buffer(5)
+        await asyncio.sleep(0.01)
+        submit.assert_not_called()
+        web.add_to_buffer(10)
+        await asyncio.sleep(0.01)
+        submit.assert_awaited_once()
+        await web.stop_async_dispatcher()
+
+
+def test_dispatcher_backoff_holds_while_samples_arrive(configuration):
+    web = Web(configuration, flush_threshold=3)
+    web._dispatch_interval = 0.05
+    web._dispatch_policy.jitter = 0
+    attempts = []
+
+    def fail(buffer, timeout=None):
+        attempts.append(time.monotonic())
+        raise DispatchError("The request to the server timed out.")
+
+    with patch.object(web, "_submit_buffer", side_effect=fail):
+        with patch.object(web._configuration.logger, "error"):
+            web.start_dispatcher()
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                web.add_to_buffer(5)
+                time.sleep(0.01)
+            retries = list(attempts)
+            state = web.circuit_state()
+            web.stop_dispatcher()
+
+    # Backed off by 0.1, 0.2 and 0.4 seconds after each consecutive failure.
+    assert len(retries) >= 2
+    assert all(later - earlier >= 0.09 for earlier, later in zip(retries, retries[1:]))
+    assert state == "closed"
+
+
+@httpretty.activate
+def test_circuit_opens_after_consecutive_dispatch_failures(
+    web, caplog, set_HIREFIRE_TOKEN
+):
+    mock_http_response(status=500)
+    with freeze_time("2000-01-01 00:00:00") as frozen_time:
+        web.add_to_buffer(5)
+        for _ in range(5):
+            assert web.circuit_state() == "closed"
+            web._dispatch_buffer()
+        assert web.circuit_state() == "open"
+        assert "Pausing dispatch until the server recovers." in caplog.text
+
+        with patch.object(web, "_submit_buffer") as submit:
+            web._dispatch_buffer()
+            submit.assert_not_called()
+
+        frozen_time.tick(30)
+        mock_http_response()
+        web._dispatch_buffer()
+        assert web.circuit_state() == "closed"
+        assert web._buffer == {}
+
+
+def test_stats(web):
+    stats = web.stats()
+    assert stats.pop("buffer_bytes") > 0
+    assert stats == {
+        "samples_recorded": 0,
+        "samples_dropped": 0,
+        "buffer_seconds": 0,
+        "buffer_samples": 0,
+        "dispatches": 0,
+        "dispatches_skipped": 0,
+        "dispatch_failures": {},
+        "dispatch_latency_last_ms": None,
+        "dispatch_latency_p50_ms": None,
+        "dispatch_latency_p99_ms": None,
+        "lock_contentions": 0,
+        "lock_wait_ms": 0,
+        "circuit_state": "closed",
+        "dispatch_interval": 1,
+        "dispatch_timeout": 5,
+        "buffer_ttl": 60,
+    }
+
+
+def test_stats_buffer(configuration):
+    clock = FakeClock(1634367001)
+    web = Web(configuration, clock=clock)
+    empty_bytes = web.stats()["buffer_bytes"]
+    web.add_to_buffer(5)
+    web.add_to_buffer(10)
+    clock.tick(1)
+    web.add_to_buffer(15)
+    stats = web.stats()
+    assert stats["samples_recorded"] == 3
+    assert stats["buffer_seconds"] == 2
+    assert stats["buffer_samples"] == 3
+    assert stats["buffer_bytes"] > empty_bytes
+
+    web._flush_buffer()
+    stats = web.stats()
+    assert stats["samples_recorded"] == 3
+    assert stats["buffer_samples"] == 0
+
+
+def test_stats_sharded_buffer(configuration):
+    web = Web(configuration, sharded=True, clock=FakeClock(1634367001))
+    web.add_to_buffer(5)
+    web.add_to_buffer(10)
+    assert web.stats()["samples_recorded"] == 2
+    assert web.stats()["buffer_samples"] == 2
+    web._flush_buffer()
+    assert web.stats()["samples_recorded"] == 2
+    assert web.stats()["buffer_samples"] == 0
+
+
+def test_stats_aggregate_buffer(configuration):
+    web = Web(configuration, aggregate=True, clock=FakeClock(1634367001))
+    web.add_to_buffer(5)
+    web.add_to_buffer(10)
+    assert web.stats()["buffer_samples"] == 2
+
+
+@httpretty.activate
+def test_stats_dispatches(web, set_HIREFIRE_TOKEN):
+    httpretty.register_uri(
+        httpretty.POST,
+        "https://logdrain.hirefire.io/",
+        adding_headers={
+            "HireFire-Resource-Dispatch-Interval": "10",
+            "HireFire-Resource-Dispatch-Timeout": "15",
+            "HireFire-Resource-Buffer-TTL": "120",
+        },
+        status=200,
+        connection="keep-alive",
+    )
+    web.add_to_buffer(5)
+    web._dispatch_buffer()
+    stats = web.stats()
+    assert stats["dispatches"] == 1
+    assert stats["dispatch_latency_last_ms"] > 0
+    assert stats["dispatch_latency_p50_ms"] == stats["dispatch_latency_last_ms"]
+    assert stats["dispatch_latency_p99_ms"] == stats["dispatch_latency_last_ms"]
+    assert stats["dispatch_interval"] == 10
+    assert stats["dispatch_timeout"] == 15
+    assert stats["buffer_ttl"] == 120
+
+
+@httpretty.activate
+def test_stats_dispatch_failures(web, set_HIREFIRE_TOKEN):
+    mock_http_response(status=500)
+    web.add_to_buffer(5)
+    web._dispatch_buffer()
+
+    with patch("http.client.HTTPSConnection.request", side_effect=socket.timeout):
+        web._dispatch_buffer()
+
+    stats = web.stats()
+    assert stats["dispatches"] == 0
+    assert stats["dispatch_failures"] == {
+        "HTTP 500": 1,
+        type(socket.timeout()).__name__: 1,
+    }
+    assert stats["dispatch_latency_last_ms"] is not None
+
+
+@httpretty.activate
+def test_stats_dispatches_skipped_while_circuit_open(web, set_HIREFIRE_TOKEN):
+    mock_http_response(status=500)
+    with freeze_time("2000-01-01 00:00:00"):
+        web.add_to_buffer(5)
+        for _ in range(6):
+            web._dispatch_buffer()
+        assert web.stats()["circuit_state"] == "open"
+        assert web.stats()["dispatches_skipped"] == 1
+
+
+@httpretty.activate
+def test_stats_samples_dropped(web, set_HIREFIRE_TOKEN):
+    mock_http_response(status=500)
+    with freeze_time("2000-01-01 00:00:00"):
+        web.add_to_buffer(5)
+        web.add_to_buffer(10)
+    with freeze_time("2000-01-01 00:01:01"):
+        web._dispatch_buffer()
+    assert web.stats()["samples_dropped"] == 2
+
+
+def test_stats_lock_wait(web):
+    web._mutex.acquire()
+    thread = threading.Thread(target=web.add_to_buffer, args=(5,))
+    thread.start()
+    time.sleep(0.05)
+    web._mutex.release()
+    thread.join()
+
+    stats = web.stats()
+    assert stats["lock_contentions"] == 1
+    assert stats["lock_wait_ms"] >= 10
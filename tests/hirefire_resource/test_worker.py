@@ -1,5 +1,12 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
 import pytest
+from freezegun import freeze_time
 
+from hirefire_resource.cache import MemoryCache
 from hirefire_resource.worker import InvalidDynoNameError, MissingDynoProcError, Worker
 
 
@@ -41,3 +48,72 @@ def test_worker_invalid_name_raises_error():
 def test_missing_dyno_proc_error():
     with pytest.raises(MissingDynoProcError):
         Worker("worker")
+
+
+def test_worker_asynchronous():
+    async def measure():
+        return 1.23
+
+    assert Worker("worker", measure).asynchronous
+    assert not Worker("worker", lambda: 1.23).asynchronous
+
+
+def test_worker_record():
+    worker = Worker("worker", lambda: 1.23)
+    assert worker.last() is None
+    assert worker.last_value is None
+    assert worker.last_value_at is None
+
+    with freeze_time("2000-01-01 00:00:00"):
+        worker.record(1.23)
+
+    assert worker.last_value == 1.23
+    assert worker.last_value_at == 946684800
+
+
+def test_worker_cached():
+    worker = Worker("worker", lambda: 1.23, ttl=10, stale_ttl=20)
+    assert worker.cached(None, now=1000) is None
+    assert worker.cached((1.23, 1000), now=1009) == "fresh"
+    assert worker.cached((1.23, 1000), now=1010) == "stale"
+    assert worker.cached((1.23, 1000), now=1029) == "stale"
+    assert worker.cached((1.23, 1000), now=1030) is None
+
+
+def test_worker_cached_without_ttl():
+    worker = Worker("worker", lambda: 1.23)
+    assert worker.cached((1.23, 1000), now=1000) is None
+
+
+def test_worker_submit_shares_evaluation_in_flight():
+    release = threading.Event()
+    worker = Worker("worker", lambda: release.wait(2) and 1.23)
+
+    with ThreadPoolExecutor() as executor:
+        future = worker.submit(executor)
+        assert worker.submit(executor) is future
+        release.set()
+        assert future.result(2) == 1.23
+        assert worker.submit(executor) is not future
+
+    assert worker.last_value == 1.23
+
+
+def test_worker_submit_runs_proc_in_callers_context():
+    variable = contextvars.ContextVar("variable")
+    variable.set("request")
+    worker = Worker("worker", variable.get)
+
+    with ThreadPoolExecutor() as executor:
+        assert worker.submit(executor).result(2) == "request"
+
+
+def test_worker_revalidation_skipped_while_locked():
+    cache = MemoryCache()
+    worker = Worker("worker", lambda: 1.23, cache=cache)
+
+    with patch.object(cache, "acquire", return_value=False):
+        with ThreadPoolExecutor() as executor:
+            assert worker.submit(executor, revalidate=True).result(2) is None
+
+    assert worker.last() is None